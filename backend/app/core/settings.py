@@ -13,6 +13,77 @@ class Settings(BaseSettings):
 
     gemini_api_key: str | None = None
     gemini_model: str = "gemini-2.5-pro"
+    # Key/model pool: extra comma-separated keys used alongside GEMINI_API_KEY, and models tried
+    # in order after GEMINI_MODEL when a model is exhausted (429) or unavailable (404) on every key.
+    gemini_api_keys: str = ""
+    gemini_fallback_models: str = ""
+    # Max concurrent Gemini calls per worker; extra requests wait for a free slot.
+    gemini_max_concurrency: int = 8
+    # Client-side quota per API key and worker (0 = unlimited). Split each key's quota across workers.
+    gemini_requests_per_minute: int = 60
+    gemini_tokens_per_minute: int = 1_000_000
+    # Max time a call may wait in the quota queue before failing with "limite de uso".
+    gemini_queue_wait_seconds: float = 30.0
+    # Retries on 429/ResourceExhausted, with jittered exponential backoff.
+    gemini_max_retries: int = 3
+    gemini_retry_base_delay_seconds: float = 1.0
+    # On MAX_TOKENS: "continue" asks only for the missing tail, "retry" regenerates everything.
+    gemini_truncation_strategy: str = "continue"
+    # Per-call timeout (0 = wait for the SDK); timeouts count as circuit breaker failures.
+    gemini_timeout_seconds: float = 60.0
+    # Circuit breaker: opens after N failures/timeouts within the window (0 = disabled), fails fast
+    # while open, then lets half-open probe calls through. Fallback: serve the heuristic draft while open.
+    gemini_breaker_failure_threshold: int = 5
+    gemini_breaker_window_seconds: float = 60.0
+    gemini_breaker_open_seconds: float = 30.0
+    gemini_breaker_half_open_probes: int = 1
+    gemini_breaker_fallback: bool = False
+    # Model backend: live (Gemini) | record (live + save answers) | replay (offline, saved answers)
+    gemini_backend: str = "live"
+    gemini_recordings_dir: str = ".cache/gemini_recordings"
+    # Replay fault injection for load tests: latency + jitter, and per-call MAX_TOKENS / 429 rates (0..1).
+    gemini_replay_latency_ms: float = 0.0
+    gemini_replay_jitter_ms: float = 0.0
+    gemini_replay_truncation_rate: float = 0.0
+    gemini_replay_rate_limit_rate: float = 0.0
+    gemini_replay_seed: int | None = None
+    # Length-aware routing: resumes whose estimated JSON answer fits GEMINI_FAST_MAX_OUTPUT_TOKENS go to
+    # GEMINI_FAST_MODEL with a budget sized to them (plus a thinking allowance); larger ones go to
+    # GEMINI_MODEL. Off while GEMINI_FAST_MODEL is empty.
+    gemini_fast_model: str = ""
+    gemini_fast_max_output_tokens: int = 6144
+    # Compact the resume text before prompting (page furniture, whitespace, broken lines, noise).
+    gemini_text_compaction: bool = True
+    # Extraction: "single" prompt, "sectioned" (one prompt per section group, in parallel)
+    # or "auto" (sectioned for texts with at least GEMINI_SECTIONED_MIN_CHARS characters).
+    gemini_extraction_mode: str = "auto"
+    gemini_sectioned_min_chars: int = 6000
+    # mode=auto on /api/extract: below this heuristic confidence (0..1) the Gemini result is used.
+    heuristic_min_confidence: float = 0.85
+    # /ready answers 503 once this many extractions wait behind the GEMINI_MAX_CONCURRENCY slots.
+    ready_max_extraction_queue: int = 8
+
+    # Extraction cache: memory | sqlite | redis | none
+    extraction_cache_backend: str = "memory"
+    extraction_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+    extraction_cache_max_entries: int = 512
+    extraction_cache_sqlite_path: str = ".cache/extraction_cache.sqlite3"
+    extraction_cache_redis_url: str = "redis://localhost:6379/0"
+
+    # Parser pool: process | thread. 0 workers = one per CPU core.
+    parser_executor: str = "process"
+    parser_max_workers: int = 0
+    parser_max_queue: int = 16
+    parser_timeout_seconds: float = 30.0
+
+    # Batch imports (/api/batch)
+    batch_max_concurrency: int = 4
+    batch_max_items: int = 200
+    # Cap on the whole multipart body of one batch, enforced while it streams in (files are 5MB each).
+    batch_max_upload_mb: int = 100
+    # Unfinished batches allowed at once (more get 503); finished ones are kept up to this count for polling.
+    batch_max_jobs: int = 50
+    batch_max_retries: int = 3
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -30,6 +101,16 @@ class Settings(BaseSettings):
             return ["*"]
         return [origin.strip() for origin in value.split(",") if origin.strip()]
 
+    @property
+    def gemini_api_keys_list(self) -> list[str]:
+        keys = [self.gemini_api_key or "", *(self.gemini_api_keys or "").split(",")]
+        return list(dict.fromkeys(key.strip() for key in keys if key.strip()))
+
+    @property
+    def gemini_models_list(self) -> list[str]:
+        models = [self.gemini_model, *(self.gemini_fallback_models or "").split(",")]
+        return list(dict.fromkeys(model.strip() for model in models if model.strip()))
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -8,18 +8,36 @@ try:
 except ImportError:
     pass
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app.core.metrics import EXTRACTIONS_IN_FLIGHT, GEMINI_CALLS_IN_FLIGHT, REGISTRY, MetricsMiddleware
 from app.core.settings import get_settings
-from app.routers import extract, generate, parse
+from app.routers import batch, extract, generate, parse
+from app.services.circuit_breaker import get_gemini_breaker
+from app.services.gemini_clients import get_gemini_clients
+from app.services.parser_pool import get_parser_pool
+from app.services.template_registry import get_template_registry
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    get_template_registry().preload()
+    get_gemini_clients().start()
+    yield
+    get_parser_pool().shutdown()
+
+
 app = FastAPI(
     title="ResumeATS API",
     description="API to transform problematic resumes into ATS-friendly resumes.",
     version=settings.app_version,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -29,10 +47,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(parse.router, prefix="/api", tags=["Parse"])
 app.include_router(extract.router, prefix="/api", tags=["Extract"])
 app.include_router(generate.router, prefix="/api", tags=["Generate"])
+app.include_router(batch.router, prefix="/api", tags=["Batch"])
 
 
 @app.get("/")
@@ -47,3 +67,47 @@ async def root() -> dict:
 @app.get("/health")
 async def health() -> dict:
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """
+    Readiness for the load balancer: 503 while this worker is saturated
+    (parser pool full, too many extractions queued) or templates are not loaded yet.
+    Gemini's circuit breaker is reported but never fails readiness: it is shared
+    upstream state, and parse/generate keep working while it is open.
+    """
+    pool = get_parser_pool()
+    registry = get_template_registry()
+    extraction_limit = settings.gemini_max_concurrency + settings.ready_max_extraction_queue
+    extractions = int(EXTRACTIONS_IN_FLIGHT.value())
+
+    reasons = []
+    if pool.in_flight >= pool.capacity:
+        reasons.append("parser_pool_saturated")
+    if extractions >= extraction_limit:
+        reasons.append("extractions_saturated")
+    if not registry.preloaded:
+        reasons.append("templates_not_loaded")
+
+    body = {
+        "status": "not_ready" if reasons else "ready",
+        "reasons": reasons,
+        "parse": {"in_flight": pool.in_flight, "limit": pool.capacity},
+        "extraction": {
+            "in_flight": extractions,
+            "limit": extraction_limit,
+            "gemini_calls": int(GEMINI_CALLS_IN_FLIGHT.value()),
+            "gemini_max_concurrency": settings.gemini_max_concurrency,
+            "quota_waiting": get_gemini_clients().waiting,
+        },
+        "gemini_breaker": get_gemini_breaker().stats(),
+        "gemini_pool": get_gemini_clients().stats(),
+        "templates": registry.stats(),
+    }
+    return JSONResponse(body, status_code=503 if reasons else 200)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -1,3 +1,3 @@
-from . import extract, generate, parse
+from . import batch, extract, generate, parse
 
-__all__ = ["parse", "extract", "generate"]
+__all__ = ["parse", "extract", "generate", "batch"]
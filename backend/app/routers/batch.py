@@ -0,0 +1,110 @@
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.settings import get_settings
+from app.routers.parse import MAX_FILE_SIZE_BYTES
+from app.services.batch_jobs import BatchBusyError, BatchItem, BatchJob, get_batch_manager
+from app.services.upload_stream import UploadRejectedError, receive_batch_upload
+
+router = APIRouter()
+
+# The body is streamed by hand, so describe the multipart form for /docs explicitly.
+BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                        "texts": {"type": "array", "items": {"type": "string"}},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+def _get_job(batch_id: str) -> BatchJob:
+    job = get_batch_manager().get(batch_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Lote nao encontrado.")
+    return job
+
+
+@router.post("/batch", status_code=202, openapi_extra=BATCH_REQUEST_BODY)
+async def create_batch(request: Request) -> dict:
+    """
+    Submit many resumes at once (PDF/DOCX files and/or raw texts).
+    The form is streamed like /parse: each file is checked (type, 5MB) as it arrives,
+    and the item count and total size are capped before the body is fully read.
+    Items are parsed and extracted in the background; poll /batch/{id}
+    or stream /batch/{id}/results to receive each item as it finishes.
+    Refused with 503 while BATCH_MAX_JOBS batches are still running.
+    """
+    settings = get_settings()
+    manager = get_batch_manager()
+    try:
+        # Checked before reading the body, and again on submit (others may have arrived meanwhile).
+        manager.check_capacity()
+    except BatchBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    try:
+        uploads, texts = await receive_batch_upload(
+            request,
+            file_field="files",
+            text_field="texts",
+            max_item_bytes=MAX_FILE_SIZE_BYTES,
+            max_items=settings.batch_max_items,
+            max_total_bytes=settings.batch_max_upload_mb * 1024 * 1024,
+        )
+    except UploadRejectedError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    total = len(uploads) + len(texts)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Envie ao menos um arquivo ou texto.")
+
+    items = [BatchItem(index=index, name=upload.filename, upload=upload) for index, upload in enumerate(uploads)]
+    for text in texts:
+        items.append(BatchItem(index=len(items), name=f"texto-{len(items) + 1}", text=text))
+
+    try:
+        job = manager.submit(items)
+    except BatchBusyError as exc:
+        for upload in uploads:
+            upload.close()
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return {
+        "success": True,
+        "batch_id": job.id,
+        "total": total,
+        "status_url": f"/api/batch/{job.id}",
+        "results_url": f"/api/batch/{job.id}/results",
+        "message": "Lote recebido. Acompanhe o processamento pelo status ou pelos resultados.",
+    }
+
+
+@router.get("/batch/{batch_id}")
+async def get_batch_status(batch_id: str) -> dict:
+    return _get_job(batch_id).status()
+
+
+async def _stream_results(job: BatchJob) -> AsyncIterator[bytes]:
+    async for result in job.iter_results():
+        yield (json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+@router.get("/batch/{batch_id}/results")
+async def stream_batch_results(batch_id: str) -> StreamingResponse:
+    """
+    NDJSON stream with one line per item, in completion order.
+    Already finished items are sent immediately; the stream ends when the batch is done.
+    """
+    job = _get_job(batch_id)
+    return StreamingResponse(_stream_results(job), media_type="application/x-ndjson")
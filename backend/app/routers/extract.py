@@ -1,29 +1,50 @@
+import json
+from typing import AsyncIterator, Literal
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.services.ai_extractor import extract_resume_data
+from app.core.metrics import stage_timer
+from app.services.ai_extractor import extract_resume, stream_resume_data
+from app.services.extraction_cache import get_extraction_cache
 
 router = APIRouter()
 
 
 class ExtractRequest(BaseModel):
     text: str
+    # ai: Gemini | fast: rules only, no Gemini | auto: rules, Gemini when confidence is low
+    mode: Literal["ai", "fast", "auto"] = "ai"
+
+
+class ExtractStreamRequest(BaseModel):
+    text: str
+
+
+def _validate_text(text: str) -> None:
+    if not text or len(text.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Texto muito curto ou vazio.")
 
 
 @router.post("/extract")
 async def extract_data(request: ExtractRequest) -> dict:
     """
-    Extract structured resume data using Gemini Pro.
+    Extract structured resume data using Gemini Pro, the rule-based parser (mode=fast)
+    or the parser with Gemini as fallback for low-confidence results (mode=auto).
     """
-    if not request.text or len(request.text.strip()) < 50:
-        raise HTTPException(status_code=400, detail="Texto muito curto ou vazio.")
+    _validate_text(request.text)
 
     try:
-        resume_data = await extract_resume_data(request.text)
+        resume_data, source, confidence = await extract_resume(request.text, request.mode)
+        with stage_timer("json_serialization"):
+            data = resume_data.model_dump(mode="json")
         return {
             "success": True,
-            "data": resume_data.model_dump(mode="json"),
+            "data": data,
             "message": "Dados extraidos com sucesso. Revise antes de gerar o curriculo.",
+            "source": source,
+            "confidence": confidence,
         }
     except RuntimeError as exc:
         detail = str(exc)
@@ -35,3 +56,48 @@ async def extract_data(request: ExtractRequest) -> dict:
             status_code=500,
             detail="Erro inesperado ao extrair dados com IA.",
         )
+
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _stream_sections(text: str) -> AsyncIterator[bytes]:
+    try:
+        async for kind, key, payload in stream_resume_data(text):
+            if kind == "section":
+                yield _ndjson({"type": "section", "key": key, "data": payload})
+                continue
+            with stage_timer("json_serialization"):
+                data = payload.model_dump(mode="json")
+            yield _ndjson(
+                {
+                    "type": "done",
+                    "data": data,
+                    "source": key,
+                    "message": "Dados extraidos com sucesso. Revise antes de gerar o curriculo.",
+                }
+            )
+    except RuntimeError as exc:
+        yield _ndjson({"type": "error", "detail": str(exc)})
+    except Exception:
+        yield _ndjson({"type": "error", "detail": "Erro inesperado ao extrair dados com IA."})
+
+
+@router.post("/extract/stream")
+async def extract_data_stream(request: ExtractStreamRequest) -> StreamingResponse:
+    """
+    Same extraction as /extract (mode=ai), streamed as NDJSON while Gemini answers:
+    one {"type": "section"} per top-level section as soon as it is complete (already normalized),
+    then {"type": "done"} with the final, enriched data, or {"type": "error"}.
+    """
+    _validate_text(request.text)
+    return StreamingResponse(_stream_sections(request.text), media_type="application/x-ndjson")
+
+
+@router.get("/extract/cache")
+async def extract_cache_stats() -> dict:
+    """
+    Hit/miss counters of the extraction cache for this worker.
+    """
+    return get_extraction_cache().stats()
@@ -1,51 +1,113 @@
-from fastapi import APIRouter, File, HTTPException, UploadFile
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from app.services.docx_parser import parse_docx
-from app.services.pdf_parser import parse_pdf
+from app.services.parser_pool import ParserBusyError, ParserTimeoutError, get_parser_pool
+from app.services.pdf_parser import PAGE_BREAK, iter_pdf_pages, parse_pdf
+from app.services.upload_stream import SpooledUpload, UploadRejectedError, receive_upload
 
 router = APIRouter()
 
 MAX_FILE_SIZE_BYTES = 5 * 1024 * 1024  # 5MB
 
+# The body is streamed by hand, so describe the multipart form for /docs explicitly.
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
 
-def detect_file_type(content: bytes) -> str | None:
-    if content.startswith(b"%PDF"):
-        return "pdf"
-
-    if content.startswith(b"PK\x03\x04"):
-        return "docx"
-
-    return None
 
-
-@router.post("/parse")
-async def parse_resume(file: UploadFile = File(...)) -> dict:
+@router.post("/parse", openapi_extra=UPLOAD_REQUEST_BODY)
+async def parse_resume(request: Request) -> dict:
     """
     Upload and parse PDF/DOCX resume content.
-    File type is validated by magic bytes (not by content_type).
+    File type is validated by magic bytes (not by content_type) on the first chunk,
+    and the size cap is enforced while the upload streams in.
     """
-    content = await file.read()
-
-    if not content:
-        raise HTTPException(status_code=400, detail="Arquivo vazio.")
-
-    if len(content) > MAX_FILE_SIZE_BYTES:
-        raise HTTPException(status_code=400, detail="Arquivo muito grande. Maximo: 5MB.")
-
-    detected_type = detect_file_type(content)
-    if detected_type is None:
-        raise HTTPException(status_code=400, detail="Formato nao suportado. Use PDF ou DOCX.")
+    try:
+        upload = await receive_upload(request, "file", MAX_FILE_SIZE_BYTES)
+    except UploadRejectedError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     try:
-        text = await parse_pdf(content) if detected_type == "pdf" else await parse_docx(content)
+        detected_type = upload.detected_type
+        text = await parse_pdf(upload.source) if detected_type == "pdf" else await parse_docx(upload.source)
         return {
             "success": True,
-            "filename": file.filename,
+            "filename": upload.filename,
             "detected_type": detected_type,
             "text": text,
             "message": "Texto extraido com sucesso. Agora envie para a IA.",
         }
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ParserBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except ParserTimeoutError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {exc}") from exc
+    finally:
+        upload.close()
+
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _stream_parsed_pages(upload: SpooledUpload) -> AsyncIterator[bytes]:
+    parts: list[str] = []
+    try:
+        yield _ndjson({"type": "file", "filename": upload.filename, "detected_type": upload.detected_type})
+        if upload.detected_type == "pdf":
+            async for page_number, text in get_parser_pool().stream(iter_pdf_pages, upload.source):
+                parts.append(text)
+                yield _ndjson({"type": "page", "page": page_number, "text": text})
+            if not parts:
+                raise ValueError("PDF nao contem texto extraivel (provavel PDF escaneado/imagem).")
+        else:
+            # DOCX has no page boundaries; it is sent as a single chunk.
+            text = await parse_docx(upload.source)
+            parts.append(text)
+            yield _ndjson({"type": "page", "page": 1, "text": text})
+        yield _ndjson(
+            {
+                "type": "done",
+                "pages": len(parts),
+                "text": PAGE_BREAK.join(parts).strip(),
+                "message": "Texto extraido com sucesso. Agora envie para a IA.",
+            }
+        )
+    except (ValueError, ParserBusyError, ParserTimeoutError) as exc:
+        yield _ndjson({"type": "error", "detail": str(exc)})
+    except Exception as exc:
+        yield _ndjson({"type": "error", "detail": f"Erro ao processar arquivo: {exc}"})
+    finally:
+        upload.close()
+
+
+@router.post("/parse/stream", openapi_extra=UPLOAD_REQUEST_BODY)
+async def parse_resume_stream(request: Request) -> StreamingResponse:
+    """
+    Same as /parse, but streams NDJSON events as each PDF page is parsed:
+    {"type": "file"}, one {"type": "page"} per page, then {"type": "done"} or {"type": "error"}.
+    """
+    try:
+        upload = await receive_upload(request, "file", MAX_FILE_SIZE_BYTES)
+    except UploadRejectedError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return StreamingResponse(_stream_parsed_pages(upload), media_type="application/x-ndjson")
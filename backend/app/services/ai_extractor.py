@@ -1,20 +1,40 @@
+import asyncio
+import copy
 import json
 import re
+import time
 import unicodedata
 import warnings
-from typing import Any
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Any, AsyncIterator
 
 # Suprimir warnings de deprecação
 warnings.filterwarnings('ignore', category=FutureWarning, module='google.generativeai')
 warnings.filterwarnings('ignore', category=DeprecationWarning)
 
-import google.generativeai as genai
-from google.generativeai.generative_models import GenerativeModel
 from google.api_core import exceptions as google_exceptions
 from pydantic import ValidationError
 
+from app.core.metrics import (
+    EXTRACTIONS_IN_FLIGHT,
+    GEMINI_CALLS_IN_FLIGHT,
+    GEMINI_FAILOVERS,
+    GEMINI_FINISH_REASONS,
+    GEMINI_RETRIES,
+    GEMINI_ROUTES,
+    TEXT_COMPACTION_TOKENS,
+    stage_timer,
+)
 from app.core.settings import get_settings
 from app.models.schemas import ResumeData
+from app.services.circuit_breaker import CircuitOpenError, get_gemini_breaker
+from app.services.extraction_cache import build_cache_key, get_extraction_cache
+from app.services.gemini_backend import get_model_backend
+from app.services.gemini_clients import NOT_FOUND, RATE_LIMITED, get_gemini_clients
+from app.services.json_stream import TopLevelObjectParser
+from app.services.text_compaction import COMPACTION_VERSION, compact_resume_text
+from app.services.rate_limiter import RateLimitExceededError, estimate_tokens
 
 
 PROMPT_TEMPLATE = """
@@ -156,8 +176,85 @@ RETRY_SUFFIX = """
 - Retorne SOMENTE JSON válido, sem markdown
 """
 
+CONTINUATION_PROMPT = """
+Sua resposta anterior foi cortada por limite de tokens.
+Continue o JSON EXATAMENTE a partir do último caractere que você escreveu:
+- NÃO repita nada do que já foi enviado e NÃO reinicie o objeto
+- NÃO use markdown nem comentários
+- Mantenha a mesma FIDELIDADE ao texto original do currículo
+- Termine fechando todas as listas e objetos abertos
+"""
+
+SECTION_SCOPE_SUFFIX = """
+
+⚠️ ATENÇÃO - EXTRAÇÃO POR SEÇÕES:
+- O texto acima é apenas um TRECHO do currículo; as outras seções são extraídas separadamente
+- Retorne um JSON contendo SOMENTE as chaves: [[CHAVES]]
+- NÃO inclua nenhuma outra chave, nem com null ou []
+- Mantenha a mesma FIDELIDADE ABSOLUTA ao texto original
+"""
+
+SCHEMA_FIELD_PATTERN = re.compile(r'^  "(\w+)":')
+
+
+def _split_prompt_template(template: str) -> tuple[str, dict[str, str], str]:
+    """
+    Separa o prompt em (regras ate o inicio do schema, {chave: linhas do schema}, trecho do curriculo).
+    Os prompts por secao usam so as regras, o schema das suas chaves e o curriculo, sem os exemplos.
+    """
+    schema_start = template.index("{\n", template.index("5. ESTRUTURA JSON:"))
+    schema_end = template.index("\n}\n", schema_start)
+    fields: dict[str, list[str]] = {}
+    for line in template[schema_start + 2 : schema_end].split("\n"):
+        match = SCHEMA_FIELD_PATTERN.match(line)
+        if match:
+            fields[match.group(1)] = []
+        fields[next(reversed(fields))].append(line)
+    schema = {key: "\n".join(lines).rstrip(",") for key, lines in fields.items()}
+    return template[:schema_start], schema, template[template.index("CURRÍCULO A SER EXTRAÍDO:") :]
+
+
+PROMPT_RULES, PROMPT_SCHEMA_FIELDS, PROMPT_TEXT_SECTION = _split_prompt_template(PROMPT_TEMPLATE)
+
+
+def _section_prompt_template(payload_keys: tuple[str, ...]) -> str:
+    fields = [PROMPT_SCHEMA_FIELDS[key] for key in payload_keys]
+    if "extracurricular_experiences" in payload_keys and "experiences" not in payload_keys:
+        # The extracurricular schema points at "experiences", which this prompt does not carry.
+        index = payload_keys.index("extracurricular_experiences")
+        fields[index] = PROMPT_SCHEMA_FIELDS["experiences"].replace('"experiences"', '"extracurricular_experiences"', 1)
+    scope = SECTION_SCOPE_SUFFIX.replace("[[CHAVES]]", ", ".join(payload_keys))
+    return PROMPT_RULES + "{\n" + ",\n".join(fields) + "\n}\n\n" + PROMPT_TEXT_SECTION + scope
+
+
+# Cache-key stand-in for the per-chunk prompts (their keys follow from the text).
+SECTION_PROMPT_TEMPLATE = _section_prompt_template(tuple(PROMPT_SCHEMA_FIELDS))
+
 PRIMARY_MAX_OUTPUT_TOKENS = 12288
 RETRY_MAX_OUTPUT_TOKENS = 16384
+# Answer tokens per continuation call (the thinking allowance below is added on top).
+CONTINUATION_MAX_OUTPUT_TOKENS = 8192
+MAX_CONTINUATIONS = 2
+
+# Length-aware routing: estimated JSON answer size, in tokens. The answer copies the text
+# verbatim (plus quoting and keys), and each section/bullet adds an object or list item.
+ROUTING_BASE_OUTPUT_TOKENS = 300
+ROUTING_OUTPUT_PER_INPUT_TOKEN = 1.1
+ROUTING_TOKENS_PER_SECTION = 50
+ROUTING_TOKENS_PER_BULLET = 10
+ROUTING_HEADROOM = 1.5
+# Smallest answer budget for a whole resume and for one section chunk.
+ROUTING_MIN_ANSWER_TOKENS = 2048
+SECTION_MIN_ANSWER_TOKENS = 1024
+# Gemini 2.5 models think before answering and the thinking counts against max_output_tokens
+# (this SDK has no thinking_config to cap it), so every budget reserves this on top of the answer.
+ROUTING_THINKING_TOKENS = 8192
+ROUTING_MAX_OUTPUT_TOKENS = 32768
+BULLET_LINE_PATTERN = re.compile(r"^(?:[-–—•·▪◦●○■□➢➤►*]|\d{1,2}[.)]\s)")
+
+# Bump whenever _normalize_resume_payload/_enrich_payload_with_text_hints change output,
+# so cached extractions produced by older rules are not served anymore.
+NORMALIZER_VERSION = "1"
 
 
 def _clean_json_response(raw_text: str) -> str:
@@ -177,9 +274,147 @@ def _clean_json_response(raw_text: str) -> str:
     return content
 
 
-def _is_quota_or_rate_error(error_text: str) -> bool:
-    lowered = error_text.lower()
-    keywords = [
+def _splice_continuation(truncated: str, continuation: str) -> str:
+    """Append a continuation, dropping any prefix the model repeated from the truncated tail."""
+    continuation = re.sub(r"^```(?:json)?\s*", "", continuation.strip(), flags=re.IGNORECASE)
+    continuation = re.sub(r"\s*```$", "", continuation)
+    tail = truncated[-200:]
+    for size in range(min(len(tail), len(continuation)), 0, -1):
+        if size >= 8 and tail.endswith(continuation[:size]):
+            continuation = continuation[size:]
+            break
+    return truncated + continuation
+
+
+def _repair_truncated_json(content: str) -> str | None:
+    """
+    Tolerant incremental scan of a (possibly truncated) JSON object.
+    Returns the first complete object, or the longest prefix that ends on a complete
+    value with the still-open lists/objects closed. None if nothing usable.
+    """
+    start = content.find("{")
+    if start == -1:
+        return None
+
+    closers: list[str] = []
+    in_string = False
+    escaped = False
+    last_safe: tuple[int, list[str]] | None = None
+    for index in range(start, len(content)):
+        char = content[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not closers or closers[-1] != char:
+                break
+            closers.pop()
+            if not closers:
+                return content[start : index + 1]
+            last_safe = (index + 1, list(closers))
+        elif char == ",":
+            # Everything before a structural comma is a complete value.
+            last_safe = (index, list(closers))
+
+    if last_safe is None:
+        return None
+    cut, open_closers = last_safe
+    return content[start:cut] + "".join(reversed(open_closers))
+
+
+class KeywordMatcher:
+    """
+    Uma familia de palavras-chave compilada numa unica regex de alternancia.
+    matches(text) equivale a any(keyword in text for keyword in keywords), com uma so varredura.
+    """
+
+    def __init__(self, keywords: tuple[str, ...] | list[str]) -> None:
+        self.keywords = tuple(keywords)
+        # Mais longas primeiro; sem palavras-chave, nunca casa (como any() de lista vazia).
+        ordered = sorted(set(self.keywords), key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(keyword) for keyword in ordered) if ordered else r"(?!)")
+
+    def matches(self, text: str) -> bool:
+        return self._pattern.search(text) is not None
+
+
+@lru_cache(maxsize=256)
+def _keyword_matcher(keywords: tuple[str, ...]) -> KeywordMatcher:
+    """Matcher para listas montadas em tempo de execucao (ancoras, padroes de busca)."""
+    return KeywordMatcher(keywords)
+
+
+MONTH_TOKENS = ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez")
+MONTH_MATCHER = KeywordMatcher(MONTH_TOKENS)
+PERIOD_MATCHER = KeywordMatcher((*MONTH_TOKENS, "atual", "presente"))
+CURRENT_MATCHER = KeywordMatcher(("atual", "presente"))
+CITY_MARKER_MATCHER = KeywordMatcher(("sao luis", "sp", "rj", "ma"))
+EXTRACURRICULAR_MATCHER = KeywordMatcher(
+    (
+        "extracurricular",
+        "liga",
+        "volunt",
+        "academica",
+        "acadêmica",
+        "membro",
+        "diretoria",
+        "centro academico",
+        "projeto academico",
+    )
+)
+TECHNICAL_HINT_MATCHER = KeywordMatcher(
+    (
+        "html",
+        "css",
+        "javascript",
+        "typescript",
+        "react",
+        "next",
+        "node",
+        "express",
+        "flask",
+        "api",
+        "sql",
+        "mysql",
+        "postgres",
+        "python",
+        "php",
+        "orm",
+        "jwt",
+        "oauth",
+        "rest",
+        "docker",
+    )
+)
+TOOL_HINT_MATCHER = KeywordMatcher(
+    (
+        "git",
+        "github",
+        "figma",
+        "postman",
+        "supabase",
+        "tailwind",
+        "bootstrap",
+        "opencv",
+        "numpy",
+        "pdf2image",
+        "poppler",
+        "cli",
+        "scriptcase",
+        "localstorage",
+    )
+)
+QUOTA_ERROR_MATCHER = KeywordMatcher(
+    (
         "quota",
         "quota exceeded",
         "exceeded your current quota",
@@ -189,8 +424,12 @@ def _is_quota_or_rate_error(error_text: str) -> bool:
         "429",
         "too many requests",
         "free_tier",
-    ]
-    return any(keyword in lowered for keyword in keywords)
+    )
+)
+
+
+def _is_quota_or_rate_error(error_text: str) -> bool:
+    return QUOTA_ERROR_MATCHER.matches(error_text.lower())
 
 
 def _ensure_list(value: object) -> list[object]:
@@ -247,6 +486,13 @@ def _normalize_url(value: object) -> str | None:
     return None
 
 
+NON_MATCH_CHARS_PATTERN = re.compile(r"[^a-z0-9\s:/|.-]")
+REPEATED_SPACES_PATTERN = re.compile(r"\s{2,}")
+
+
+# The same lines go through section split, section parsers and text-hint enrichment;
+# caching makes each distinct line normalized once per resume instead of once per pass.
+@lru_cache(maxsize=8192)
 def _normalize_for_match(value: str) -> str:
     if not value:
         return ""
@@ -260,8 +506,8 @@ def _normalize_for_match(value: str) -> str:
     normalized = unicodedata.normalize("NFKD", value)
     without_marks = "".join(char for char in normalized if not unicodedata.combining(char))
     lowered = without_marks.lower()
-    lowered = re.sub(r"[^a-z0-9\s:/|.-]", "", lowered)
-    lowered = re.sub(r"\s{2,}", " ", lowered)
+    lowered = NON_MATCH_CHARS_PATTERN.sub("", lowered)
+    lowered = REPEATED_SPACES_PATTERN.sub(" ", lowered)
     return lowered.strip()
 
 
@@ -274,19 +520,7 @@ def _looks_extracurricular(exp: dict) -> bool:
             " ".join(str(a) for a in exp.get("achievements", [])),
         ]
     )
-    combined = _normalize_for_match(combined)
-    keywords = [
-        "extracurricular",
-        "liga",
-        "volunt",
-        "academica",
-        "acadêmica",
-        "membro",
-        "diretoria",
-        "centro academico",
-        "projeto academico",
-    ]
-    return any(keyword in combined for keyword in keywords)
+    return EXTRACURRICULAR_MATCHER.matches(_normalize_for_match(combined))
 
 
 def _normalize_experience_item(item: dict, headline: str | None = None) -> dict:
@@ -362,21 +596,19 @@ def _extract_lines(raw_text: str) -> list[str]:
 
 
 def _find_first_line(lines: list[str], patterns: list[str]) -> str | None:
-    lowered_patterns = [_normalize_for_match(pattern) for pattern in patterns if pattern]
+    matcher = _keyword_matcher(tuple(_normalize_for_match(pattern) for pattern in patterns if pattern))
     for line in lines:
-        lowered = _normalize_for_match(line)
-        if any(pattern in lowered for pattern in lowered_patterns):
+        if matcher.matches(_normalize_for_match(line)):
             return line
     return None
 
 
 def _find_anchor_index(lines: list[str], anchors: list[str]) -> int | None:
-    lowered_anchors = [
-        _normalize_for_match(anchor) for anchor in anchors if anchor and len(anchor.strip()) >= 3
-    ]
+    matcher = _keyword_matcher(
+        tuple(_normalize_for_match(anchor) for anchor in anchors if anchor and len(anchor.strip()) >= 3)
+    )
     for i, line in enumerate(lines):
-        lowered = _normalize_for_match(line)
-        if any(anchor in lowered for anchor in lowered_anchors):
+        if matcher.matches(_normalize_for_match(line)):
             return i
     return None
 
@@ -492,6 +724,53 @@ def _split_sections_from_text(raw_text: str) -> dict[str, list[str]]:
     return sections
 
 
+# Grupos da extracao por secoes: (secoes do texto, chaves do JSON pedidas ao modelo).
+# O cabecalho vai junto com resumo/habilidades para o modelo ter nome e headline.
+SECTION_GROUPS: tuple[tuple[tuple[str, ...], tuple[str, ...]], ...] = (
+    (
+        ("header", "summary", "skills", "courses", "languages"),
+        ("personal_info", "summary", "skills", "certifications", "languages"),
+    ),
+    (("experience", "extracurricular"), ("experiences", "extracurricular_experiences")),
+    (("projects",), ("projects",)),
+    (("education",), ("education",)),
+)
+
+# Titulos reinseridos no trecho enviado (o split descarta a linha do titulo).
+SECTION_TITLES = {
+    "summary": "Resumo Profissional",
+    "skills": "Habilidades",
+    "experience": "Experiência Profissional",
+    "extracurricular": "Experiência Extracurricular",
+    "projects": "Projetos",
+    "education": "Formação Acadêmica",
+    "courses": "Cursos Complementares",
+    "languages": "Idiomas",
+}
+
+
+def _build_section_chunks(raw_text: str) -> list[tuple[str, tuple[str, ...]]]:
+    """
+    Divide o texto nos grupos de SECTION_GROUPS; retorna (trecho, chaves) so dos grupos com conteudo.
+    Chaves de grupos sem titulo detectado sao pedidas a todos os trechos, para nao se perderem.
+    """
+    sections = _split_sections_from_text(raw_text)
+    chunks: list[tuple[str, tuple[str, ...]]] = []
+    missing_keys: list[str] = []
+    for section_keys, payload_keys in SECTION_GROUPS:
+        blocks = []
+        for key in section_keys:
+            if not sections[key]:
+                continue
+            title = SECTION_TITLES.get(key)
+            blocks.append("\n".join([title, *sections[key]] if title else sections[key]))
+        if blocks:
+            chunks.append(("\n\n".join(blocks), payload_keys))
+        else:
+            missing_keys.extend(payload_keys)
+    return [(chunk, (*payload_keys, *missing_keys)) for chunk, payload_keys in chunks]
+
+
 def _merge_list_unique(base: list[str], extra: list[str]) -> list[str]:
     return _dedupe_keep_order([*base, *extra])
 
@@ -551,8 +830,8 @@ def _is_experience_header_line(line: str) -> bool:
     if line.startswith("-"):
         return False
     has_year = bool(re.search(r"(19|20)\d{2}", normalized))
-    has_month = any(m in normalized for m in ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"))
-    has_current = "atual" in normalized or "presente" in normalized
+    has_month = MONTH_MATCHER.matches(normalized)
+    has_current = CURRENT_MATCHER.matches(normalized)
     if "|" in line and (has_year or has_month):
         return True
     if len(line) <= 100 and has_year and has_current:
@@ -641,12 +920,12 @@ def _parse_extracurricular_section(lines: list[str], default_position: str) -> l
     date_line_idx = None
     for idx, line in enumerate(lines):
         normalized = _normalize_for_match(line)
-        if _is_experience_header_line(line) or any(month in normalized for month in ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez")):
+        if _is_experience_header_line(line) or MONTH_MATCHER.matches(normalized):
             start_date, end_date, current = _parse_dates_from_period(line)
             parts = re.split(r"[?|]", line)
             for part in parts:
                 part_norm = _normalize_for_match(part)
-                if any(city_marker in part_norm for city_marker in ("sao luis", "sp", "rj", "ma")) and not re.search(r"\d{4}", part):
+                if CITY_MARKER_MATCHER.matches(part_norm) and not re.search(r"\d{4}", part):
                     location = part.strip()
             date_line_idx = idx
             break
@@ -914,10 +1193,8 @@ def _extract_company_line_from_section(lines: list[str], section_title: str) ->
     if section_idx is None:
         return None
 
-    month_tokens = ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez")
     for line in lines[section_idx + 1 : section_idx + 12]:
-        normalized = _normalize_for_match(line)
-        if "|" in line and any(token in normalized for token in month_tokens):
+        if "|" in line and MONTH_MATCHER.matches(_normalize_for_match(line)):
             return _normalize_company_name(line.split("|", 1)[0])
     return None
 
@@ -930,50 +1207,11 @@ def _rebalance_skills(skills_obj: dict) -> dict:
     if not isinstance(categorized, dict):
         categorized = {}
 
-    technical_hints = (
-        "html",
-        "css",
-        "javascript",
-        "typescript",
-        "react",
-        "next",
-        "node",
-        "express",
-        "flask",
-        "api",
-        "sql",
-        "mysql",
-        "postgres",
-        "python",
-        "php",
-        "orm",
-        "jwt",
-        "oauth",
-        "rest",
-        "docker",
-    )
-    tool_hints = (
-        "git",
-        "github",
-        "figma",
-        "postman",
-        "supabase",
-        "tailwind",
-        "bootstrap",
-        "opencv",
-        "numpy",
-        "pdf2image",
-        "poppler",
-        "cli",
-        "scriptcase",
-        "localstorage",
-    )
-
     move_to_technical: list[str] = []
     keep_tools: list[str] = []
     for item in tools:
         lowered = item.lower()
-        if any(hint in lowered for hint in technical_hints) and not any(hint in lowered for hint in tool_hints):
+        if TECHNICAL_HINT_MATCHER.matches(lowered) and not TOOL_HINT_MATCHER.matches(lowered):
             move_to_technical.append(item)
         else:
             keep_tools.append(item)
@@ -982,7 +1220,7 @@ def _rebalance_skills(skills_obj: dict) -> dict:
     keep_technical: list[str] = []
     for item in technical:
         lowered = item.lower()
-        if any(hint in lowered for hint in tool_hints) and not any(hint in lowered for hint in technical_hints):
+        if TOOL_HINT_MATCHER.matches(lowered) and not TECHNICAL_HINT_MATCHER.matches(lowered):
             move_to_tools.append(item)
         else:
             keep_technical.append(item)
@@ -1175,10 +1413,7 @@ def _company_is_date_string(value: str) -> bool:
     """Retorna True se o valor parece string de data/periodo, nao nome de empresa."""
     normalized = _normalize_for_match(value)
     has_year = bool(re.search(r"\d{4}", normalized))
-    has_period = any(m in normalized for m in (
-        "jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez",
-        "atual", "presente",
-    ))
+    has_period = PERIOD_MATCHER.matches(normalized)
     return has_year and has_period
 
 
@@ -1210,23 +1445,33 @@ def _merge_experience_collections(current_items: list[dict], section_items: list
 
     merged = [dict(item) for item in current_items]
     index_by_key = {_experience_identity(item): idx for idx, item in enumerate(merged)}
+    # Indice secundario: itens sem company, por position normalizada, em ordem de posicao.
+    companyless_by_position: dict[str, deque[int]] = defaultdict(deque)
+    for idx, item in enumerate(merged):
+        if not item.get("company"):
+            companyless_by_position[_normalize_for_match(str(item.get("position", "")))].append(idx)
 
     for section_item in section_items:
         key = _experience_identity(section_item)
         idx = index_by_key.get(key)
 
         # Fallback: se section_item tem company mas nao ha match exato,
-        # tenta casar por position com itens que tenham company vazia.
+        # tenta casar por position com o primeiro item que ainda tenha company vazia.
         if idx is None and section_item.get("company"):
             sec_position = _normalize_for_match(str(section_item.get("position", "")))
-            for i, m in enumerate(merged):
-                if not m.get("company") and _normalize_for_match(str(m.get("position", ""))) == sec_position:
-                    idx = i
-                    break
+            candidates = companyless_by_position.get(sec_position)
+            while candidates and merged[candidates[0]].get("company"):
+                candidates.popleft()  # ganhou company num merge anterior
+            if candidates:
+                idx = candidates[0]
 
         if idx is None:
             merged.append(dict(section_item))
             index_by_key[key] = len(merged) - 1
+            if not section_item.get("company"):
+                companyless_by_position[_normalize_for_match(str(section_item.get("position", "")))].append(
+                    len(merged) - 1
+                )
             continue
 
         target = merged[idx]
@@ -1387,84 +1632,194 @@ def _enrich_payload_with_text_hints(data: dict, raw_text: str) -> dict:
     return data
 
 
-def _finish_reason_name(response: object) -> str | None:
-    try:
-        candidates = getattr(response, "candidates", None) or []
-        if not candidates:
-            return None
-        candidate = candidates[0]
-        finish_reason = getattr(candidate, "finish_reason", None)
-        if finish_reason is None:
-            return None
-        return candidate.FinishReason(finish_reason).name
-    except Exception:
+def _is_rate_limited(exc: Exception) -> bool:
+    return isinstance(exc, google_exceptions.ResourceExhausted) or _is_quota_or_rate_error(str(exc))
+
+
+def _failover_reason(exc: Exception) -> str | None:
+    """Erros que fazem o pool tentar outra chave/modelo; o timeout da fila local nunca entra aqui."""
+    if isinstance(exc, RateLimitExceededError):
         return None
+    if isinstance(exc, google_exceptions.NotFound):
+        return NOT_FOUND
+    if _is_rate_limited(exc):
+        return RATE_LIMITED
+    return None
 
 
-def _generate_json_content(model: Any, prompt: str, max_output_tokens: int) -> tuple[str, str | None]:
-    response = model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.0,  # Máxima determinística - zero criatividade
-            "top_p": 0.1,  # Restringe amostragem para previsibilidade
-            "top_k": 1,  # Sempre escolhe o token mais provável
-            "max_output_tokens": max_output_tokens,
-            "response_mime_type": "application/json",
-        },
-    )
-    content = (response.text or "").strip()
-    return content, _finish_reason_name(response)
+def _record_failover(key: Any, model_name: str, reason: str) -> None:
+    get_gemini_clients().record_failure(key, model_name, reason)
+    GEMINI_FAILOVERS.inc(reason)
+    if reason == RATE_LIMITED:
+        GEMINI_RETRIES.inc()
 
 
-async def extract_resume_data(text: str) -> ResumeData:
-    settings = get_settings()
-    if not settings.gemini_api_key:
-        raise RuntimeError("Servico de IA nao configurado. Defina GEMINI_API_KEY no backend/.env.")
+def _prompt_text(prompt: str | list[dict]) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return "".join(str(part) for message in prompt for part in message.get("parts", []))
 
-    genai.configure(api_key=settings.gemini_api_key)  # type: ignore[attr-defined]
-    model = GenerativeModel(settings.gemini_model)
 
-    try:
-        prompt = PROMPT_TEMPLATE.replace("[[CURRICULO_TEXT]]", text)
-        content, finish_reason = _generate_json_content(
-            model=model,
-            prompt=prompt,
-            max_output_tokens=PRIMARY_MAX_OUTPUT_TOKENS,
-        )
+def _generation_config(max_output_tokens: int, response_mime_type: str) -> dict:
+    return {
+        "temperature": 0.0,  # Máxima determinística - zero criatividade
+        "top_p": 0.1,  # Restringe amostragem para previsibilidade
+        "top_k": 1,  # Sempre escolhe o token mais provável
+        "max_output_tokens": max_output_tokens,
+        "response_mime_type": response_mime_type,
+    }
+
+
+async def _generate_json_content(
+    model_name: str,
+    prompt: str | list[dict],
+    max_output_tokens: int,
+    response_mime_type: str = "application/json",
+) -> tuple[str, str | None]:
+    # Circuit breaker: falha na hora (CircuitOpenError) enquanto o Gemini estiver degradado.
+    with get_gemini_breaker().call():
+        return await _call_gemini(model_name, prompt, max_output_tokens, response_mime_type)
 
-        # Retry once with a stricter compact prompt when truncated.
-        if finish_reason == "MAX_TOKENS":
-            retry_prompt = f"{prompt}{RETRY_SUFFIX}"
-            content, _ = _generate_json_content(
-                model=model,
-                prompt=retry_prompt,
-                max_output_tokens=RETRY_MAX_OUTPUT_TOKENS,
+
+async def _call_gemini(
+    model_name: str,
+    prompt: str | list[dict],
+    max_output_tokens: int,
+    response_mime_type: str,
+) -> tuple[str, str | None]:
+    settings = get_settings()
+    pool = get_gemini_clients()
+    backend = get_model_backend()
+    prompt_tokens = estimate_tokens(_prompt_text(prompt))
+    attempt = 0
+    while True:
+        # Best key/model of the pool, after its request/token quota; RateLimitExceededError past
+        # GEMINI_QUEUE_WAIT_SECONDS.
+        key, name = await pool.acquire(model_name, prompt_tokens)
+        try:
+            async with pool.slots:
+                with stage_timer("gemini_call"), GEMINI_CALLS_IN_FLIGHT.track():
+                    started = time.monotonic()
+                    content, finish_reason = await asyncio.wait_for(
+                        backend.generate(
+                            pool.model(key, name), prompt, _generation_config(max_output_tokens, response_mime_type)
+                        ),
+                        timeout=settings.gemini_timeout_seconds or None,
+                    )
+            pool.record_success(key, name, time.monotonic() - started)
+            break
+        except Exception as exc:
+            reason = _failover_reason(exc)
+            if reason is None or attempt >= pool.max_retries(model_name):
+                raise
+            # 429/404: cool this key/model down and go again on the next best one.
+            _record_failover(key, name, reason)
+            attempt += 1
+    GEMINI_FINISH_REASONS.inc(finish_reason or "UNKNOWN")
+    return content, finish_reason
+
+
+async def _stream_json_content(
+    model_name: str, prompt: str, max_output_tokens: int
+) -> AsyncIterator[tuple[str, str | None]]:
+    """
+    Versao em streaming de _generate_json_content, com as mesmas protecoes (breaker, cota, slots).
+    Produz (fragmento, None) e, por ultimo, ("", finish_reason). Um 429/404 so troca de
+    chave/modelo antes do primeiro fragmento; depois disso o texto ja foi entregue ao chamador.
+    """
+    settings = get_settings()
+    pool = get_gemini_clients()
+    backend = get_model_backend()
+    timeout = settings.gemini_timeout_seconds or None
+    finish_reason: str | None = None
+    with get_gemini_breaker().call():
+        attempt = 0
+        while True:
+            key, name = await pool.acquire(model_name, estimate_tokens(prompt))
+            received = False
+            stream = backend.stream(
+                pool.model(key, name), prompt, _generation_config(max_output_tokens, "application/json")
             )
-    except Exception as exc:
-        message = str(exc)
-        lowered = message.lower()
-        if isinstance(exc, google_exceptions.ResourceExhausted):
-            raise RuntimeError(
-                "Servico de IA temporariamente indisponivel por limite de uso. Tente novamente em alguns minutos."
-            ) from exc
-        if isinstance(exc, google_exceptions.NotFound):
-            raise RuntimeError(
-                f"Modelo Gemini '{settings.gemini_model}' nao esta disponivel para esta chave/API."
-            ) from exc
-        if isinstance(exc, (google_exceptions.PermissionDenied, google_exceptions.Unauthenticated)):
-            raise RuntimeError("GEMINI_API_KEY invalida ou sem permissao para este modelo.") from exc
-        if _is_quota_or_rate_error(message):
-            raise RuntimeError(
-                "Servico de IA temporariamente indisponivel por limite de uso. Tente novamente em alguns minutos."
-            ) from exc
-        if "not found" in lowered and "model" in lowered:
-            raise RuntimeError(
-                f"Modelo Gemini '{settings.gemini_model}' nao esta disponivel para esta chave/API."
-            ) from exc
-        if "api key not valid" in lowered or "permission denied" in lowered or "403" in lowered:
-            raise RuntimeError("GEMINI_API_KEY invalida ou sem permissao para este modelo.") from exc
-        raise RuntimeError("Falha ao comunicar com o Gemini. Tente novamente.") from exc
+            try:
+                async with pool.slots:
+                    with stage_timer("gemini_call"), GEMINI_CALLS_IN_FLIGHT.track():
+                        started = time.monotonic()
+                        while True:
+                            try:
+                                # The timeout applies to each chunk: a stalled stream fails like a hung call.
+                                fragment, finish_reason = await asyncio.wait_for(anext(stream), timeout)
+                            except StopAsyncIteration:
+                                break
+                            received = True
+                            yield fragment, finish_reason
+                pool.record_success(key, name, time.monotonic() - started)
+                break
+            except Exception as exc:
+                reason = _failover_reason(exc)
+                if received or reason is None or attempt >= pool.max_retries(model_name):
+                    raise
+                _record_failover(key, name, reason)
+                attempt += 1
+            finally:
+                await stream.aclose()
+    GEMINI_FINISH_REASONS.inc(finish_reason or "UNKNOWN")
+
+
+async def _continue_truncated_json(model_name: str, prompt: str, truncated: str) -> tuple[str, str | None]:
+    """
+    Ask the model to resume a MAX_TOKENS answer from where it stopped (multi-turn),
+    instead of regenerating the whole JSON. Returns the spliced text and last finish reason.
+    """
+    content = truncated
+    finish_reason: str | None = "MAX_TOKENS"
+    for _ in range(MAX_CONTINUATIONS):
+        contents = [
+            {"role": "user", "parts": [prompt]},
+            {"role": "model", "parts": [content]},
+            {"role": "user", "parts": [CONTINUATION_PROMPT]},
+        ]
+        # The fragment is not valid JSON on its own, so it cannot use the JSON mime type.
+        continuation, finish_reason = await _generate_json_content(
+            model_name=model_name,
+            prompt=contents,
+            max_output_tokens=CONTINUATION_MAX_OUTPUT_TOKENS + ROUTING_THINKING_TOKENS,
+            response_mime_type="text/plain",
+        )
+        if not continuation:
+            break
+        content = _splice_continuation(content, continuation)
+        if finish_reason != "MAX_TOKENS":
+            break
+    return content, finish_reason
 
+
+def _gemini_error(exc: Exception, model_name: str) -> RuntimeError:
+    """Traduz falhas da chamada ao Gemini para as mensagens exibidas ao usuario."""
+    message = str(exc)
+    lowered = message.lower()
+    quota_error = RuntimeError(
+        "Servico de IA temporariamente indisponivel por limite de uso. Tente novamente em alguns minutos."
+    )
+    model_error = RuntimeError(f"Modelo Gemini '{model_name}' nao esta disponivel para esta chave/API.")
+    key_error = RuntimeError("GEMINI_API_KEY invalida ou sem permissao para este modelo.")
+    if isinstance(exc, asyncio.TimeoutError):
+        return RuntimeError("Gemini nao respondeu a tempo. Tente novamente.")
+    if isinstance(exc, (RateLimitExceededError, google_exceptions.ResourceExhausted)):
+        return quota_error
+    if isinstance(exc, google_exceptions.NotFound):
+        return model_error
+    if isinstance(exc, (google_exceptions.PermissionDenied, google_exceptions.Unauthenticated)):
+        return key_error
+    if _is_quota_or_rate_error(message):
+        return quota_error
+    if "not found" in lowered and "model" in lowered:
+        return model_error
+    if "api key not valid" in lowered or "permission denied" in lowered or "403" in lowered:
+        return key_error
+    return RuntimeError("Falha ao comunicar com o Gemini. Tente novamente.")
+
+
+def _parse_model_json(content: str, finish_reason: str | None) -> object:
     if not content:
         raise RuntimeError(
             "Não conseguimos processar seu currículo no momento. "
@@ -1475,7 +1830,14 @@ async def extract_resume_data(text: str) -> ResumeData:
     cleaned = _clean_json_response(content)
 
     try:
-        parsed = json.loads(cleaned)
+        try:
+            return json.loads(cleaned)
+        except json.JSONDecodeError:
+            # A still-truncated answer keeps every complete field instead of failing outright.
+            repaired = _repair_truncated_json(content) if finish_reason == "MAX_TOKENS" else None
+            if repaired is None:
+                raise
+            return json.loads(repaired)
     except json.JSONDecodeError as exc:
         raise RuntimeError(
             "Tivemos dificuldade em interpretar seu currículo. "
@@ -1483,10 +1845,336 @@ async def extract_resume_data(text: str) -> ResumeData:
             "💡 Dica: tente simplificar o layout ou converter para um formato mais limpo."
         ) from exc
 
+
+async def _complete_truncated(
+    model_name: str, prompt: str, content: str, finish_reason: str | None, max_output_tokens: int
+) -> tuple[str, str | None]:
+    """Trata uma resposta em MAX_TOKENS; `max_output_tokens` e o orcamento da chamada que truncou."""
+    if finish_reason != "MAX_TOKENS":
+        return content, finish_reason
+    if get_settings().gemini_truncation_strategy == "continue":
+        # Keep the truncated JSON and only ask for the missing tail.
+        return await _continue_truncated_json(model_name, prompt, content)
+    # Retry once with a stricter compact prompt when truncated, never below the routed budget.
+    return await _generate_json_content(
+        model_name=model_name,
+        prompt=f"{prompt}{RETRY_SUFFIX}",
+        max_output_tokens=max(RETRY_MAX_OUTPUT_TOKENS, max_output_tokens),
+    )
+
+
+async def _request_payload(model_name: str, prompt: str, max_output_tokens: int) -> object:
+    """Uma chamada ao Gemini (com continuacao/retry em MAX_TOKENS), ja convertida de JSON."""
     try:
-        normalized = _normalize_resume_payload(parsed)
-        normalized = _enrich_payload_with_text_hints(normalized, text)
-        return ResumeData(**normalized)
+        content, finish_reason = await _generate_json_content(
+            model_name=model_name,
+            prompt=prompt,
+            max_output_tokens=max_output_tokens,
+        )
+        content, finish_reason = await _complete_truncated(
+            model_name, prompt, content, finish_reason, max_output_tokens
+        )
+    except CircuitOpenError:
+        # Already user-facing; callers also match on it for the heuristic fallback.
+        raise
+    except Exception as exc:
+        raise _gemini_error(exc, model_name) from exc
+
+    with stage_timer("json_cleanup"):
+        return _parse_model_json(content, finish_reason)
+
+
+def _estimate_output_tokens(text: str) -> int:
+    """Estimativa do tamanho do JSON de resposta: texto copiado, secoes detectadas e bullets."""
+    sections = [lines for lines in _split_sections_from_text(text).values() if lines]
+    bullets = sum(1 for line in _extract_lines(text) if BULLET_LINE_PATTERN.match(line))
+    return int(
+        ROUTING_BASE_OUTPUT_TOKENS
+        + estimate_tokens(text) * ROUTING_OUTPUT_PER_INPUT_TOKEN
+        + len(sections) * ROUTING_TOKENS_PER_SECTION
+        + bullets * ROUTING_TOKENS_PER_BULLET
+    )
+
+
+def _route_extraction(text: str, min_answer_tokens: int, max_output_tokens: int = 0) -> tuple[str, int]:
+    """
+    Escolhe (modelo, max_output_tokens) para um prompt a partir do texto que ele carrega.
+    O orcamento e a resposta estimada (no minimo `min_answer_tokens`) mais ROUTING_THINKING_TOKENS.
+    Respostas estimadas que cabem em GEMINI_FAST_MAX_OUTPUT_TOKENS vao para GEMINI_FAST_MODEL
+    com esse orcamento; as maiores vao para GEMINI_MODEL com pelo menos `max_output_tokens`.
+    """
+    settings = get_settings()
+    estimate = _estimate_output_tokens(text) * ROUTING_HEADROOM
+    # Rounded up to 1024, so the budget does not change with every character.
+    answer_budget = max(min_answer_tokens, (int(estimate) + 1023) // 1024 * 1024)
+    budget = min(ROUTING_MAX_OUTPUT_TOKENS, answer_budget + ROUTING_THINKING_TOKENS)
+    fast_model = (settings.gemini_fast_model or "").strip()
+    if fast_model and answer_budget <= settings.gemini_fast_max_output_tokens:
+        route = fast_model, budget
+    else:
+        route = settings.gemini_model, max(max_output_tokens, budget)
+    GEMINI_ROUTES.inc(route[0])
+    return route
+
+
+def _use_sectioned_extraction(text: str, chunks: list[tuple[str, tuple[str, ...]]]) -> bool:
+    settings = get_settings()
+    mode = (settings.gemini_extraction_mode or "auto").strip().lower()
+    if mode == "single" or len(chunks) < 2:
+        return False
+    return mode == "sectioned" or len(text) >= settings.gemini_sectioned_min_chars
+
+
+def _merge_section_payloads(payloads: list[object], chunks: list[tuple[str, tuple[str, ...]]]) -> dict:
+    """
+    Junta as respostas por secao num unico payload bruto (antes da normalizacao).
+    Cada resposta so contribui com as chaves pedidas ao seu grupo; experiencias e
+    projetos repetidos entre grupos passam pelos mesmos merges do enriquecimento.
+    """
+    merged: dict = {}
+    for payload, (_, payload_keys) in zip(payloads, chunks):
+        if not isinstance(payload, dict):
+            continue
+        for key in payload_keys:
+            value = payload.get(key)
+            if value is None:
+                continue
+            if key in {"experiences", "extracurricular_experiences"}:
+                items = [item for item in _ensure_list(value) if isinstance(item, dict)]
+                merged[key] = _merge_experience_collections(merged.get(key, []), items)
+            elif key == "projects":
+                items = [item for item in _ensure_list(value) if isinstance(item, dict)]
+                merged[key] = _merge_projects(merged.get(key, []), items)
+            elif isinstance(value, list):
+                existing = merged.setdefault(key, [])
+                seen = {json.dumps(item, sort_keys=True, default=str) for item in existing}
+                existing.extend(
+                    item for item in value if json.dumps(item, sort_keys=True, default=str) not in seen
+                )
+            elif not merged.get(key):
+                merged[key] = value
+    return merged
+
+
+# Peso de cada campo na confianca geral da extracao heuristica.
+HEURISTIC_FIELD_WEIGHTS = {
+    "personal_info": 3.0,
+    "experiences": 3.0,
+    "skills": 2.0,
+    "summary": 1.0,
+    "extracurricular_experiences": 1.0,
+    "education": 1.0,
+    "certifications": 1.0,
+    "projects": 1.0,
+    "languages": 1.0,
+}
+
+# Secao do texto de onde cada campo sai; campo vazio com secao detectada = parser falhou.
+HEURISTIC_FIELD_SECTIONS = {
+    "summary": "summary",
+    "skills": "skills",
+    "experiences": "experience",
+    "extracurricular_experiences": "extracurricular",
+    "education": "education",
+    "certifications": "courses",
+    "projects": "projects",
+    "languages": "languages",
+}
+
+# Valores de preenchimento usados pelos parsers quando o dado nao foi encontrado.
+PLACEHOLDER_VALUES = {
+    "",
+    "nao informado",
+    "cargo nao informado",
+    "experiencia profissional",
+    "experiencia extracurricular",
+}
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[a-z]{2,}$", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+
+
+def _is_filled(value: object) -> bool:
+    if isinstance(value, list):
+        return bool(value)
+    return _normalize_for_match(str(value or "")) not in PLACEHOLDER_VALUES
+
+
+def _is_title(value: object) -> bool:
+    # Fragmentos de frase (minuscula, marcador) indicam linha de bullet caindo no campo errado.
+    return _is_filled(value) and _is_valid_project_name(str(value))
+
+
+def _item_completeness(item: dict, kind: str) -> float:
+    if kind == "experience":
+        company = _normalize_for_match(str(item.get("company") or ""))
+        checks = [
+            # Empresa igual ao cargo: o parser nao achou a empresa e repetiu a linha do cargo.
+            _is_title(item.get("company")) and company != _normalize_for_match(str(item.get("position") or "")),
+            _is_title(item.get("position")),
+            bool(YEAR_PATTERN.search(str(item.get("start_date") or ""))),
+            _is_filled(item.get("achievements")),
+        ]
+    elif kind == "education":
+        checks = [
+            _is_title(item.get("institution")),
+            _is_title(item.get("degree")),
+            bool(YEAR_PATTERN.search(str(item.get("start_date") or ""))),
+        ]
+    elif kind == "certification":
+        checks = [_is_title(item.get("name")), _is_filled(item.get("issuer"))]
+    elif kind == "project":
+        checks = [_is_title(item.get("name")), _is_filled(item.get("description"))]
+    else:
+        checks = [_is_filled(item.get("language")), _is_filled(item.get("proficiency"))]
+    return sum(checks) / len(checks)
+
+
+def _score_heuristic_payload(data: dict, sections: dict[str, list[str]]) -> dict[str, float]:
+    """
+    Confianca (0..1) por campo do resultado heuristico, mais a media ponderada em "overall".
+    Campo vazio cuja secao foi detectada no texto vale 0; sem secao detectada, provavelmente
+    nao existe no curriculo e vale 0.7.
+    """
+    personal = data.get("personal_info", {})
+    full_name = str(personal.get("full_name") or "")
+    personal_checks = [
+        bool(full_name) and len(full_name.split()) <= 6 and not re.search(r"[\d@:]", full_name),
+        bool(EMAIL_PATTERN.match(str(personal.get("email") or ""))),
+        _is_filled(personal.get("phone")),
+        _is_filled(personal.get("location")),
+    ]
+    scores = {"personal_info": sum(personal_checks) / len(personal_checks)}
+
+    kinds = {
+        "experiences": "experience",
+        "extracurricular_experiences": "experience",
+        "education": "education",
+        "certifications": "certification",
+        "projects": "project",
+        "languages": "language",
+    }
+    skills = data.get("skills", {})
+    values = {
+        "summary": data.get("summary"),
+        "skills": [*skills.get("technical", []), *skills.get("tools", []), *skills.get("categorized", {})],
+        **{field: data.get(field) or [] for field in kinds},
+    }
+    for field, value in values.items():
+        section_found = bool(sections.get(HEURISTIC_FIELD_SECTIONS[field]))
+        if not _is_filled(value):
+            scores[field] = 0.0 if section_found else 0.7
+            continue
+        base = 1.0 if section_found else 0.6
+        if field in kinds:
+            items = [item for item in value if isinstance(item, dict)]
+            base *= sum(_item_completeness(item, kinds[field]) for item in items) / max(len(items), 1)
+        scores[field] = round(base, 2)
+
+    total_weight = sum(HEURISTIC_FIELD_WEIGHTS.values())
+    overall = sum(scores[field] * weight for field, weight in HEURISTIC_FIELD_WEIGHTS.items()) / total_weight
+    scores["overall"] = round(overall, 2)
+    return scores
+
+
+def extract_resume_data_heuristic(text: str) -> tuple[ResumeData, dict[str, float]]:
+    """
+    Extracao so por regras (secoes, datas, skills), sem chamar o Gemini.
+    Retorna os dados e a confianca por campo; RuntimeError se nao passar na validacao.
+    """
+    try:
+        with stage_timer("heuristic_extraction"):
+            sections = _split_sections_from_text(text)
+            normalized = _normalize_resume_payload(_extract_structured_from_sections(text))
+            normalized = _enrich_payload_with_text_hints(normalized, text)
+            confidence = _score_heuristic_payload(normalized, sections)
+            resume_data = ResumeData(**normalized)
+    except ValidationError as exc:
+        fields = sorted({str(err.get("loc", ["?"])[0]) for err in exc.errors()})
+        raise RuntimeError(
+            f"Extracao rapida retornou dados fora do formato esperado. Campos invalidos: {', '.join(fields)}."
+        ) from exc
+    return resume_data, confidence
+
+
+async def extract_resume(text: str, mode: str = "ai") -> tuple[ResumeData, str, dict[str, float] | None]:
+    """
+    Extracao conforme o modo pedido:
+    - "ai": sempre Gemini.
+    - "fast": so heuristica, sem Gemini.
+    - "auto": heuristica; recorre ao Gemini se ela falhar na validacao ou tiver
+      confianca geral abaixo de HEURISTIC_MIN_CONFIDENCE.
+    Com GEMINI_BREAKER_FALLBACK, "ai" e "auto" devolvem o rascunho da heuristica
+    (origem "heuristic_fallback") enquanto o circuit breaker do Gemini estiver aberto.
+    Retorna (dados, origem "heuristic" | "heuristic_fallback" | "ai", confianca da heuristica ou None).
+    """
+    if mode == "ai":
+        return await _extract_with_fallback(text)
+
+    try:
+        resume_data, confidence = extract_resume_data_heuristic(text)
+    except RuntimeError:
+        if mode == "fast":
+            raise
+        return await _extract_with_fallback(text)
+
+    if mode == "auto" and confidence["overall"] < get_settings().heuristic_min_confidence:
+        return await _extract_with_fallback(text, (resume_data, confidence))
+    return resume_data, "heuristic", confidence
+
+
+async def _extract_with_fallback(
+    text: str, heuristic: tuple[ResumeData, dict[str, float]] | None = None
+) -> tuple[ResumeData, str, dict[str, float] | None]:
+    try:
+        return await extract_resume_data(text), "ai", heuristic[1] if heuristic else None
+    except CircuitOpenError:
+        if not get_settings().gemini_breaker_fallback:
+            raise
+        resume_data, confidence = heuristic or extract_resume_data_heuristic(text)
+        return resume_data, "heuristic_fallback", confidence
+
+
+def _ensure_ai_configured() -> None:
+    if get_model_backend().requires_api_key and not get_settings().gemini_api_keys_list:
+        raise RuntimeError("Servico de IA nao configurado. Defina GEMINI_API_KEY no backend/.env.")
+
+
+def _compact_for_prompt(text: str) -> str:
+    """Texto que vai para o prompt: compactado quando GEMINI_TEXT_COMPACTION esta ligado."""
+    if not get_settings().gemini_text_compaction:
+        return text
+    with stage_timer("text_compaction"):
+        return compact_resume_text(text, is_heading=_is_section_heading) or text
+
+
+def _is_section_heading(line: str) -> bool:
+    # Titulos de secao em minusculas ("experiencia profissional") nao sao continuacao da linha anterior.
+    return _detect_section_key(_normalize_for_match(line)) is not None
+
+
+def _pipeline_version() -> str:
+    # The compaction rules shape the prompt and the routing picks the model, so both are part of the cache key.
+    settings = get_settings()
+    version = NORMALIZER_VERSION
+    if settings.gemini_text_compaction:
+        version = f"{version}+compaction{COMPACTION_VERSION}"
+    if (settings.gemini_fast_model or "").strip():
+        version = f"{version}+route:{settings.gemini_fast_model.strip()}<={settings.gemini_fast_max_output_tokens}"
+    return version
+
+
+def _record_compaction(text: str, prompt_text: str) -> None:
+    TEXT_COMPACTION_TOKENS.inc("original", amount=estimate_tokens(text))
+    TEXT_COMPACTION_TOKENS.inc("compacted", amount=estimate_tokens(prompt_text))
+
+
+def _build_resume_data(parsed: object, text: str) -> ResumeData:
+    """Normaliza, enriquece com o texto e valida a resposta do Gemini."""
+    try:
+        with stage_timer("normalization"):
+            normalized = _normalize_resume_payload(parsed)
+            normalized = _enrich_payload_with_text_hints(normalized, text)
+            return ResumeData(**normalized)
     except ValidationError as exc:
         issues = []
         for err in exc.errors()[:3]:
@@ -1497,3 +2185,130 @@ async def extract_resume_data(text: str) -> ResumeData:
         raise RuntimeError(f"Gemini retornou dados fora do formato esperado.{suffix}") from exc
     except Exception as exc:
         raise RuntimeError("Gemini retornou dados fora do formato esperado. Tente novamente.") from exc
+
+
+async def extract_resume_data(text: str) -> ResumeData:
+    settings = get_settings()
+    _ensure_ai_configured()
+
+    prompt_text = _compact_for_prompt(text)
+    chunks = _build_section_chunks(prompt_text)
+    sectioned = _use_sectioned_extraction(prompt_text, chunks)
+    prompt_template = SECTION_PROMPT_TEMPLATE if sectioned else PROMPT_TEMPLATE
+
+    cache = get_extraction_cache()
+    cache_key = build_cache_key(text, settings.gemini_model, prompt_template, _pipeline_version())
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    _record_compaction(text, prompt_text)
+    with EXTRACTIONS_IN_FLIGHT.track():
+        if sectioned:
+            # Long resumes: one smaller prompt per section group, all in flight at once,
+            # each routed by the size of its own chunk.
+            with stage_timer("prompt_build"):
+                requests = [
+                    (
+                        _section_prompt_template(payload_keys).replace("[[CURRICULO_TEXT]]", chunk),
+                        *_route_extraction(chunk, SECTION_MIN_ANSWER_TOKENS),
+                    )
+                    for chunk, payload_keys in chunks
+                ]
+            tasks = [
+                asyncio.create_task(_request_payload(model_name, prompt, max_tokens))
+                for prompt, model_name, max_tokens in requests
+            ]
+            try:
+                payloads = await asyncio.gather(*tasks)
+            except BaseException:
+                # One failed chunk fails the extraction: stop the others instead of letting them
+                # spend quota, Gemini slots and breaker probes on an answer nobody reads.
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            parsed = _merge_section_payloads(list(payloads), chunks)
+        else:
+            with stage_timer("prompt_build"):
+                prompt = PROMPT_TEMPLATE.replace("[[CURRICULO_TEXT]]", prompt_text)
+                model_name, max_tokens = _route_extraction(
+                    prompt_text, ROUTING_MIN_ANSWER_TOKENS, PRIMARY_MAX_OUTPUT_TOKENS
+                )
+            parsed = await _request_payload(model_name, prompt, max_tokens)
+
+    resume_data = _build_resume_data(parsed, text)
+    await cache.set(cache_key, resume_data)
+    return resume_data
+
+
+def _changed_sections(raw: dict, sent: dict) -> list[tuple[str, Any]]:
+    """Secoes normalizadas que mudaram desde o ultimo envio (o normalizador altera o payload, daí a copia)."""
+    normalized = _normalize_resume_payload(copy.deepcopy(raw))
+    changed = [(key, value) for key, value in normalized.items() if sent.get(key) != value]
+    sent.update(changed)
+    return changed
+
+
+async def stream_resume_data(text: str) -> AsyncIterator[tuple[str, str | None, Any]]:
+    """
+    Extracao em streaming (sempre prompt unico). Produz:
+    - ("section", chave, dados): cada secao de topo assim que o Gemini a conclui, ja normalizada
+      (uma secao pode ser reenviada se outra concluida depois mudar sua normalizacao);
+    - ("done", origem, ResumeData): o resultado final, normalizado, enriquecido e validado
+      como em extract_resume_data.
+    Com GEMINI_BREAKER_FALLBACK e o circuit breaker aberto, entrega o rascunho da heuristica.
+    """
+    settings = get_settings()
+    _ensure_ai_configured()
+
+    cache = get_extraction_cache()
+    cache_key = build_cache_key(text, settings.gemini_model, PROMPT_TEMPLATE, _pipeline_version())
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        yield "done", "ai", cached
+        return
+
+    prompt_text = _compact_for_prompt(text)
+    _record_compaction(text, prompt_text)
+    with stage_timer("prompt_build"):
+        prompt = PROMPT_TEMPLATE.replace("[[CURRICULO_TEXT]]", prompt_text)
+        model_name, max_tokens = _route_extraction(
+            prompt_text, ROUTING_MIN_ANSWER_TOKENS, PRIMARY_MAX_OUTPUT_TOKENS
+        )
+
+    parser = TopLevelObjectParser()
+    raw: dict = {}
+    # Defaults of an empty payload are not worth sending: a section goes out once the model fills it.
+    sent = _normalize_resume_payload({})
+    fragments: list[str] = []
+    finish_reason: str | None = None
+    with EXTRACTIONS_IN_FLIGHT.track():
+        try:
+            async for fragment, finish_reason in _stream_json_content(model_name, prompt, max_tokens):
+                fragments.append(fragment)
+                for key, value in parser.feed(fragment):
+                    raw[key] = value
+                    for section_key, section in _changed_sections(raw, sent):
+                        yield "section", section_key, section
+            content, finish_reason = await _complete_truncated(
+                model_name, prompt, "".join(fragments).strip(), finish_reason, max_tokens
+            )
+        except CircuitOpenError:
+            if not settings.gemini_breaker_fallback:
+                raise
+            resume_data, _ = extract_resume_data_heuristic(text)
+            yield "done", "heuristic_fallback", resume_data
+            return
+        except Exception as exc:
+            raise _gemini_error(exc, model_name) from exc
+
+    with stage_timer("json_cleanup"):
+        parsed = _parse_model_json(content, finish_reason)
+    if isinstance(parsed, dict):
+        # Sections that only completed after a MAX_TOKENS continuation (or that the incremental parser skipped).
+        for section_key, section in _changed_sections(parsed, sent):
+            yield "section", section_key, section
+    resume_data = _build_resume_data(parsed, text)
+    await cache.set(cache_key, resume_data)
+    yield "done", "ai", resume_data
@@ -0,0 +1,210 @@
+import asyncio
+import random
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator
+
+from app.core.settings import get_settings
+from app.services.ai_extractor import extract_resume_data
+from app.services.circuit_breaker import CircuitOpenError, get_gemini_breaker
+from app.services.docx_parser import parse_docx
+from app.services.parser_pool import ParserBusyError
+from app.services.pdf_parser import parse_pdf
+from app.services.upload_stream import SpooledUpload
+
+MIN_TEXT_LENGTH = 50
+RATE_LIMIT_MARKER = "limite de uso"
+RETRY_BASE_DELAY_SECONDS = 2.0
+
+
+class BatchBusyError(RuntimeError):
+    """Raised when BATCH_MAX_JOBS batches are still running and a new one was not accepted."""
+
+
+class BatchItem:
+    def __init__(self, index: int, name: str, text: str | None = None, upload: SpooledUpload | None = None) -> None:
+        self.index = index
+        self.name = name
+        self.text = text
+        self.upload = upload
+        self.status = "pending"  # pending | running | done | failed
+        self.attempts = 0
+        self.data: dict | None = None
+        self.error: str | None = None
+
+    def summary(self) -> dict:
+        return {
+            "index": self.index,
+            "name": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+    def result(self) -> dict:
+        return {**self.summary(), "data": self.data}
+
+
+class BatchJob:
+    def __init__(self, items: list[BatchItem]) -> None:
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.items = items
+        self.completed: list[BatchItem] = []
+        self.task: asyncio.Task | None = None
+        self._condition = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return len(self.completed) == len(self.items)
+
+    async def mark_completed(self, item: BatchItem) -> None:
+        async with self._condition:
+            self.completed.append(item)
+            self._condition.notify_all()
+
+    async def iter_results(self) -> AsyncIterator[dict]:
+        """Yield every finished item, in completion order, waiting for the ones still running."""
+        sent = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: len(self.completed) > sent or self.finished)
+                ready = self.completed[sent:]
+            for item in ready:
+                yield item.result()
+            sent += len(ready)
+            if self.finished and sent == len(self.completed):
+                return
+
+    def status(self) -> dict:
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        for item in self.items:
+            counts[item.status] += 1
+        return {
+            "batch_id": self.id,
+            "status": "finished" if self.finished else "running",
+            "total": len(self.items),
+            "counts": counts,
+            "items": [item.summary() for item in self.items],
+        }
+
+
+class BatchManager:
+    """
+    Runs batch items with a per-worker concurrency limit shared by all batches.
+    When Gemini reports a quota/rate error, every batch pauses (cooldown) and the
+    item is retried with jittered exponential backoff instead of failing at once;
+    a full parser pool is retried the same way, for that item only.
+    At most max_jobs batches run at once (new ones get BatchBusyError), and finished
+    batches are kept for polling until newer ones push them out.
+    """
+
+    def __init__(self, max_concurrency: int, max_jobs: int, max_retries: int) -> None:
+        self.max_jobs = max(1, max_jobs)
+        self.max_retries = max(0, max_retries)
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._jobs: OrderedDict[str, BatchJob] = OrderedDict()
+        self._cooldown_until = 0.0
+
+    def get(self, batch_id: str) -> BatchJob | None:
+        return self._jobs.get(batch_id)
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def check_capacity(self) -> None:
+        """Refuse new batches while max_jobs are unfinished: each one holds its spooled uploads."""
+        if self.running >= self.max_jobs:
+            raise BatchBusyError("Muitos lotes em processamento. Tente novamente em alguns minutos.")
+
+    def submit(self, items: list[BatchItem]) -> BatchJob:
+        self.check_capacity()
+        job = BatchJob(items)
+        self._jobs[job.id] = job
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            # Oldest finished jobs first; running ones (at most max_jobs) are kept.
+            finished = [batch_id for batch_id, old in self._jobs.items() if old.finished]
+            for batch_id in finished[:excess]:
+                del self._jobs[batch_id]
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: BatchJob) -> None:
+        await asyncio.gather(*(self._run_item(job, item) for item in job.items))
+
+    async def _wait_cooldown(self) -> None:
+        delay = self._cooldown_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _parse_upload(self, upload: SpooledUpload) -> str:
+        if upload.detected_type == "pdf":
+            return await parse_pdf(upload.source)
+        return await parse_docx(upload.source)
+
+    async def _item_text(self, item: BatchItem) -> str:
+        if item.text is not None:
+            return item.text
+        assert item.upload is not None
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                return await self._parse_upload(item.upload)
+            except ParserBusyError:
+                # Parser pool full (interactive uploads come first): back off instead of failing the item.
+                if attempts > self.max_retries:
+                    raise
+                delay = RETRY_BASE_DELAY_SECONDS * 2 ** (attempts - 1)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    async def _run_item(self, job: BatchJob, item: BatchItem) -> None:
+        async with self._slots:
+            item.status = "running"
+            try:
+                text = await self._item_text(item)
+                if len(text.strip()) < MIN_TEXT_LENGTH:
+                    raise ValueError("Texto muito curto ou vazio.")
+                while True:
+                    await self._wait_cooldown()
+                    item.attempts += 1
+                    try:
+                        resume_data = await extract_resume_data(text)
+                        break
+                    except CircuitOpenError:
+                        # Gemini degraded: wait for the breaker's next probe window instead of failing.
+                        if item.attempts > self.max_retries:
+                            raise
+                        delay = get_gemini_breaker().retry_after() + random.uniform(0, RETRY_BASE_DELAY_SECONDS)
+                        self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                    except RuntimeError as exc:
+                        if RATE_LIMIT_MARKER not in str(exc) or item.attempts > self.max_retries:
+                            raise
+                        delay = RETRY_BASE_DELAY_SECONDS * 2 ** (item.attempts - 1)
+                        delay += random.uniform(0, delay / 2)
+                        self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                item.data = resume_data.model_dump(mode="json")
+                item.status = "done"
+            except Exception as exc:
+                item.status = "failed"
+                item.error = str(exc) if isinstance(exc, (ValueError, RuntimeError)) else "Erro inesperado."
+            finally:
+                if item.upload is not None:
+                    item.upload.close()
+                    item.upload = None
+                item.text = None
+        await job.mark_completed(item)
+
+
+@lru_cache
+def get_batch_manager() -> BatchManager:
+    settings = get_settings()
+    return BatchManager(
+        max_concurrency=settings.batch_max_concurrency,
+        max_jobs=settings.batch_max_jobs,
+        max_retries=settings.batch_max_retries,
+    )
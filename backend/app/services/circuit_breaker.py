@@ -0,0 +1,156 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Iterator
+
+from google.api_core import exceptions as google_exceptions
+
+from app.core.settings import get_settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the service while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` failures within `window_seconds`.
+    open -> half_open after `open_seconds`: up to `half_open_probes` calls go through,
+    everyone else keeps failing fast. A successful probe closes the circuit, a failed one reopens it.
+    failure_threshold <= 0 disables the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        window_seconds: float,
+        open_seconds: float,
+        half_open_probes: int = 1,
+        is_failure: Callable[[Exception], bool] = lambda _: True,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.is_failure = is_failure
+        self._state = CLOSED
+        self._failures: deque[float] = deque()
+        self._opened_at = 0.0
+        self._probes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 when calls go through)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._failures.clear()
+        self.opened += 1
+
+    def before_call(self) -> None:
+        if not self.enabled:
+            return
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_probes):
+            self.rejected += 1
+            raise CircuitOpenError("Servico de IA instavel no momento. Tente novamente em alguns instantes.")
+        if state == HALF_OPEN:
+            self._probes += 1
+
+    def record_success(self) -> None:
+        if self._state == HALF_OPEN:
+            self._state = CLOSED
+            self._probes = 0
+            self._failures.clear()
+
+    def record_failure(self) -> None:
+        if not self.enabled or self._state == OPEN:
+            return
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        now = time.monotonic()
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window_seconds:
+            self._failures.popleft()
+        if len(self._failures) >= self.failure_threshold:
+            self._open()
+
+    def release(self) -> None:
+        """End a call without a verdict (cancelled, or failed for reasons unrelated to the service)."""
+        if self._state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    @contextmanager
+    def call(self) -> Iterator[None]:
+        """Guard one call: fail fast while open, then record the outcome."""
+        self.before_call()
+        try:
+            yield
+        except Exception as exc:
+            if self.is_failure(exc):
+                self.record_failure()
+            else:
+                self.release()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state if self.enabled else "disabled",
+            "failures_in_window": len(self._failures),
+            "retry_after_seconds": round(self.retry_after(), 1),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+def is_gemini_failure(exc: Exception) -> bool:
+    """Errors that point to a degraded Gemini: timeouts, 5xx, connection errors, quota exhausted after retries."""
+    return isinstance(
+        exc,
+        (
+            asyncio.TimeoutError,
+            OSError,
+            google_exceptions.ServerError,
+            google_exceptions.RetryError,
+            google_exceptions.ResourceExhausted,
+        ),
+    )
+
+
+@lru_cache
+def get_gemini_breaker() -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        failure_threshold=settings.gemini_breaker_failure_threshold,
+        window_seconds=settings.gemini_breaker_window_seconds,
+        open_seconds=settings.gemini_breaker_open_seconds,
+        half_open_probes=settings.gemini_breaker_half_open_probes,
+        is_failure=is_gemini_failure,
+    )
@@ -4,14 +4,13 @@ from pathlib import Path
 from datetime import datetime
 from typing import Any, cast
 
-from docx import Document as load_document
 from docx.document import Document as DocxDocument
 from docx.shared import Pt
-from docxtpl import DocxTemplate
+from docx.text.paragraph import Paragraph
 
+from app.core.metrics import stage_timer
 from app.models.schemas import ResumeData
-
-TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates"
+from app.services.template_registry import TEMPLATES_DIR, get_template_registry
 
 
 def _normalize_template_id(template_id: str) -> str:
@@ -248,157 +247,150 @@ def _set_style_arial_12(doc: DocxDocument) -> None:
     normal.font.size = Pt(12)
 
 
-def _remove_empty_paragraphs(doc: DocxDocument) -> None:
-    for paragraph in list(doc.paragraphs):
-        if paragraph.text.strip():
-            continue
-        element = paragraph._element
-        parent = element.getparent()
-        if parent is not None:
-            parent.remove(element)
+def _remove_paragraph(paragraph: Paragraph) -> None:
+    element = paragraph._element
+    parent = element.getparent()
+    if parent is not None:
+        parent.remove(element)
+
+
+HEADING_REPLACEMENTS = {
+    "Experi?ncia Profissional": "Experiência Profissional",
+    "Experi?ncia Extracurricular": "Experiência Extracurricular",
+    "Forma??o Acad?mica": "Formação Acadêmica",
+    "Habilidades T?cnicas": "Habilidades Técnicas",
+    "Experięncia Profissional": "Experiência Profissional",
+    "Experięncia Extracurricular": "Experiência Extracurricular",
+    "Experięncia acadęmica": "Experiência Acadêmica",
+    "Forma??o Acadęmica": "Formação Acadêmica",
+    "Habilidades Tęcnicas": "Habilidades Técnicas",
+    "Experiencia Profissional": "Experiência Profissional",
+    "Experiencia Extracurricular": "Experiência Extracurricular",
+    "Formacao Academica": "Formação Acadêmica",
+    "Habilidades Tecnicas": "Habilidades Técnicas",
+}
+
+HEADING_TITLES = {
+    "Resumo Profissional",
+    "Objetivo Profissional",
+    "Experiência Profissional",
+    "Experiência profissional",
+    "Experiência Extracurricular",
+    "Formação Acadêmica",
+    "Habilidades Técnicas",
+    "Tecnologias",
+    "Cursos Complementares",
+    "Cursos",
+    "Projetos",
+    "Idiomas",
+}
+
+CONTACT_PREFIXES = ("Email:", "Telefone:", "Cidade:", "Linkedin:", "Github:", "LinkedIn:", "GitHub:", "Portfólio:")
+TECH_PREFIXES = ("Tecnologias usadas:", "Linguagens e tecnologias:", "Práticas:")
+
+# (space_before, space_after) in points per paragraph role.
+ROLE_SPACING = {
+    "name": (0, 8),  # Nome (primeira linha)
+    "headline": (0, 16),  # Headline (cargo)
+    "heading": (24, 10),  # Títulos de seções
+    "contact": (0, 4),  # Informações de contato
+    "period": (12, 6),  # Linha de empresa/instituição com período (ex: "Empresa X - Cargo | 2020 - 2024")
+    "tech": (3, 6),  # Linha de tecnologias em projetos
+    "body": (3, 8),  # Parágrafos normais (descrições, achievements, etc)
+}
 
 
 def _normalize_heading_text(text: str) -> str:
-    replacements = {
-        "Experi?ncia Profissional": "Experiência Profissional",
-        "Experi?ncia Extracurricular": "Experiência Extracurricular",
-        "Forma??o Acad?mica": "Formação Acadêmica",
-        "Habilidades T?cnicas": "Habilidades Técnicas",
-        "Experięncia Profissional": "Experiência Profissional",
-        "Experięncia Extracurricular": "Experiência Extracurricular",
-        "Experięncia acadęmica": "Experiência Acadêmica",
-        "Forma??o Acadęmica": "Formação Acadêmica",
-        "Habilidades Tęcnicas": "Habilidades Técnicas",
-        "Experiencia Profissional": "Experiência Profissional",
-        "Experiencia Extracurricular": "Experiência Extracurricular",
-        "Formacao Academica": "Formação Acadêmica",
-        "Habilidades Tecnicas": "Habilidades Técnicas",
-    }
-    return replacements.get(text, text)
-
-
-def _postprocess_docx(docx_bytes: bytes) -> bytes:
-    doc = load_document(io.BytesIO(docx_bytes))
-
+    return HEADING_REPLACEMENTS.get(text, text)
+
+
+def _classify_paragraph(text: str, non_empty_index: int) -> str:
+    if non_empty_index == 0:
+        return "name"
+    if non_empty_index == 1:
+        return "headline"
+    if text in HEADING_TITLES:
+        return "heading"
+    if text.startswith(CONTACT_PREFIXES):
+        return "contact"
+    if " | " in text and ("-" in text or "Atual" in text or "Em andamento" in text):
+        return "period"
+    if text.startswith(TECH_PREFIXES):
+        return "tech"
+    return "body"
+
+
+def _postprocess_document(doc: DocxDocument) -> None:
+    """
+    Single pass over the body paragraphs: each paragraph's text is read once,
+    classified into a role and formatted; empty paragraphs are dropped on the way.
+    """
     _set_style_arial_12(doc)
 
-    # Normalize heading text that can come with encoding artifacts.
-    for paragraph in doc.paragraphs:
-        original_text = paragraph.text.strip()
-        normalized_text = _normalize_heading_text(original_text)
-        if normalized_text == original_text:
-            continue
-
-        had_bold = any(run.bold for run in paragraph.runs)
-        paragraph.text = normalized_text
-        if paragraph.runs:
-            paragraph.runs[0].bold = had_bold
-
-    heading_titles = {
-        "Resumo Profissional",
-        "Objetivo Profissional",
-        "Experiência Profissional",
-        "Experiência profissional",
-        "Experiência Extracurricular",
-        "Formação Acadêmica",
-        "Habilidades Técnicas",
-        "Tecnologias",
-        "Cursos Complementares",
-        "Cursos",
-        "Projetos",
-        "Idiomas",
-    }
-
-    first_non_empty = next((p for p in doc.paragraphs if p.text.strip()), None)
-    non_empty_paragraphs = [p for p in doc.paragraphs if p.text.strip()]
-    headline_paragraph = non_empty_paragraphs[1] if len(non_empty_paragraphs) > 1 else None
-
-    # Apply font and section-aware spacing globally.
+    non_empty_index = 0
     for paragraph in doc.paragraphs:
         text = paragraph.text.strip()
-        paragraph.paragraph_format.line_spacing = 1.15
 
-        if not text:
-            paragraph.paragraph_format.space_before = Pt(0)
-            paragraph.paragraph_format.space_after = Pt(8)
-        elif paragraph is first_non_empty:
-            # Nome (primeira linha)
-            paragraph.paragraph_format.space_before = Pt(0)
-            paragraph.paragraph_format.space_after = Pt(8)
-        elif paragraph is headline_paragraph:
-            # Headline (cargo)
-            paragraph.paragraph_format.space_before = Pt(0)
-            paragraph.paragraph_format.space_after = Pt(16)
-        elif text in heading_titles:
-            # Títulos de seções
-            paragraph.paragraph_format.space_before = Pt(24)
-            paragraph.paragraph_format.space_after = Pt(10)
-        elif text.startswith(("Email:", "Telefone:", "Cidade:", "Linkedin:", "Github:", "LinkedIn:", "GitHub:", "Portfólio:")):
-            # Informações de contato
-            paragraph.paragraph_format.space_before = Pt(0)
-            paragraph.paragraph_format.space_after = Pt(4)
-        elif " | " in text and ("-" in text or "Atual" in text or "Em andamento" in text):
-            # Linha de empresa/instituição com período (ex: "Empresa X - Cargo | 2020 - 2024")
-            paragraph.paragraph_format.space_before = Pt(12)
-            paragraph.paragraph_format.space_after = Pt(6)
-        elif text.startswith("Tecnologias usadas:") or text.startswith("Linguagens e tecnologias:") or text.startswith("Práticas:"):
-            # Linha de tecnologias em projetos
-            paragraph.paragraph_format.space_before = Pt(3)
-            paragraph.paragraph_format.space_after = Pt(6)
-        else:
-            # Parágrafos normais (descrições, achievements, etc)
-            paragraph.paragraph_format.space_before = Pt(3)
-            paragraph.paragraph_format.space_after = Pt(8)
+        # Normalize heading text that can come with encoding artifacts.
+        normalized_text = _normalize_heading_text(text)
+        if normalized_text != text:
+            had_bold = any(run.bold for run in paragraph.runs)
+            paragraph.text = normalized_text
+            text = normalized_text
+            runs = paragraph.runs
+            if runs:
+                runs[0].bold = had_bold
 
-        for run in paragraph.runs:
-            run.font.name = "Arial"
-            run.font.size = Pt(12)
+        if not text:
+            _remove_paragraph(paragraph)
+            continue
 
-    _remove_empty_paragraphs(doc)
+        role = _classify_paragraph(text, non_empty_index)
+        non_empty_index += 1
 
-    # Name at top must be larger.
-    if first_non_empty is not None:
-        for run in first_non_empty.runs:
-            run.font.name = "Arial"
-            run.font.size = Pt(18)
-            run.bold = True
+        space_before, space_after = ROLE_SPACING[role]
+        paragraph_format = paragraph.paragraph_format
+        paragraph_format.line_spacing = 1.15
+        paragraph_format.space_before = Pt(space_before)
+        paragraph_format.space_after = Pt(space_after)
 
-    # Headline below name stays subtle.
-    if len(non_empty_paragraphs) > 1:
-        non_empty_paragraphs[1].paragraph_format.space_after = Pt(16)
-        for run in non_empty_paragraphs[1].runs:
+        for run in paragraph.runs:
             run.font.name = "Arial"
-            run.font.size = Pt(12)
-            run.italic = True
-    
-    # Seções em negrito
-    for paragraph in doc.paragraphs:
-        text = paragraph.text.strip()
-        if text in heading_titles:
-            for run in paragraph.runs:
+            if role == "name":
+                # Name at top must be larger.
+                run.font.size = Pt(18)
+                run.bold = True
+            else:
+                run.font.size = Pt(12)
+                if role == "headline":
+                    # Headline below name stays subtle.
+                    run.italic = True
+            # Seções em negrito (also when the name/headline line is itself a section title).
+            if text in HEADING_TITLES:
                 run.bold = True
                 run.font.size = Pt(12)
-
-    output = io.BytesIO()
-    doc.save(output)
-    output.seek(0)
-    return output.read()
 
 
 async def generate_docx(template_id: str, resume_data: ResumeData) -> bytes:
     template_path = _template_path(template_id)
 
-    if not template_path.exists():
-        raise ValueError(f"Template '{template_id}' nao encontrado em {TEMPLATES_DIR}.")
-
-    try:
-        doc = DocxTemplate(str(template_path))
-        context = _build_context(resume_data)
-        doc.render(context)
-    except Exception as exc:
-        raise ValueError(f"Erro ao renderizar template DOCX: {exc}") from exc
-
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return _postprocess_docx(buffer.read())
+    with stage_timer("template_render"):
+        try:
+            doc = get_template_registry().acquire(template_path)
+        except FileNotFoundError as exc:
+            raise ValueError(f"Template '{template_id}' nao encontrado em {TEMPLATES_DIR}.") from exc
+
+        try:
+            context = _build_context(resume_data)
+            doc.render(context)
+        except Exception as exc:
+            raise ValueError(f"Erro ao renderizar template DOCX: {exc}") from exc
+
+    # Post-process the rendered document in memory: one render, one serialization.
+    with stage_timer("postprocess"):
+        _postprocess_document(doc.docx)
+
+    with stage_timer("docx_serialization"):
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
@@ -1,12 +1,13 @@
-import io
-
 from docx import Document
 
+from app.core.metrics import stage_timer
+from app.services.parser_pool import get_parser_pool, open_source
+
 
-async def parse_docx(file_content: bytes) -> str:
-    """Extract plain text from DOCX paragraphs and tables."""
+def extract_docx_text(source: bytes | str) -> str:
+    """Extract plain text from DOCX paragraphs and tables (blocking, runs inside the parser pool)."""
     try:
-        doc = Document(io.BytesIO(file_content))
+        doc = Document(open_source(source))
     except Exception as exc:
         raise ValueError(f"Erro ao processar DOCX: {exc}") from exc
 
@@ -29,3 +30,9 @@ async def parse_docx(file_content: bytes) -> str:
         raise ValueError("DOCX nao contem texto extraivel.")
 
     return content
+
+
+async def parse_docx(source: bytes | str) -> str:
+    """Extract plain text from DOCX without blocking the event loop."""
+    with stage_timer("parse_docx"):
+        return await get_parser_pool().run(extract_docx_text, source)
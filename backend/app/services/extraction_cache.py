@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+
+from app.core.metrics import EXTRACTION_CACHE_LOOKUPS
+from app.core.settings import get_settings
+from app.models.schemas import ResumeData
+
+
+class CacheBackend(Protocol):
+    # Backends that do I/O are run in a worker thread to keep the event loop free.
+    blocking: bool
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None: ...
+
+
+class MemoryCacheBackend:
+    """In-process LRU with TTL. Lives and dies with the worker."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._items: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl_seconds, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class SqliteCacheBackend:
+    """On-disk cache shared by every worker on the same host."""
+
+    blocking = True
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extraction_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM extraction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= time.time():
+                conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl_seconds),
+            )
+
+
+class RedisCacheBackend:
+    """Redis-compatible store (Redis, Valkey, KeyDB...). Requires the optional `redis` package."""
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "devats:extract:") -> None:
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "EXTRACTION_CACHE_BACKEND=redis requer o pacote 'redis' (pip install redis)."
+            ) from exc
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> str | None:
+        value = self._client.get(f"{self.prefix}{key}")
+        return value if isinstance(value, str) else None
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._client.set(f"{self.prefix}{key}", value, ex=ttl_seconds)
+
+
+def normalize_cache_text(text: str) -> str:
+    """Whitespace-insensitive form of the resume text, so re-uploads of the same file hit the cache."""
+    lines = (re.sub(r"\s+", " ", line).strip() for line in (text or "").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def build_cache_key(text: str, model_name: str, prompt_template: str, normalizer_version: str) -> str:
+    text_hash = hashlib.sha256(normalize_cache_text(text).encode("utf-8")).hexdigest()
+    pipeline_hash = hashlib.sha256(f"{prompt_template}\x00{normalizer_version}".encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{text_hash}:{model_name}:{pipeline_hash}".encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Stores validated ResumeData JSON keyed by build_cache_key."""
+
+    def __init__(self, backend: CacheBackend | None, ttl_seconds: int) -> None:
+        self.backend = backend
+        self.ttl_seconds = max(1, ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def _call(self, func, *args):
+        if self.backend is not None and self.backend.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def get(self, key: str) -> ResumeData | None:
+        if self.backend is None:
+            return None
+        try:
+            raw = await self._call(self.backend.get, key)
+            cached = ResumeData.model_validate_json(raw) if raw else None
+        except Exception:
+            # A broken cache must never break extraction; treat it as a miss.
+            self.errors += 1
+            cached = None
+        if cached is None:
+            self.misses += 1
+            EXTRACTION_CACHE_LOOKUPS.inc("miss")
+        else:
+            self.hits += 1
+            EXTRACTION_CACHE_LOOKUPS.inc("hit")
+        return cached
+
+    async def set(self, key: str, resume_data: ResumeData) -> None:
+        if self.backend is None:
+            return
+        try:
+            await self._call(self.backend.set, key, resume_data.model_dump_json(), self.ttl_seconds)
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _build_backend(name: str) -> CacheBackend | None:
+    settings = get_settings()
+    backend = (name or "").strip().lower()
+    if backend in {"", "none", "off", "disabled"}:
+        return None
+    if backend == "memory":
+        return MemoryCacheBackend(settings.extraction_cache_max_entries)
+    if backend == "sqlite":
+        return SqliteCacheBackend(settings.extraction_cache_sqlite_path)
+    if backend == "redis":
+        return RedisCacheBackend(settings.extraction_cache_redis_url)
+    raise RuntimeError(f"EXTRACTION_CACHE_BACKEND desconhecido: '{name}'. Use memory, sqlite, redis ou none.")
+
+
+@lru_cache
+def get_extraction_cache() -> ExtractionCache:
+    settings = get_settings()
+    return ExtractionCache(
+        backend=_build_backend(settings.extraction_cache_backend),
+        ttl_seconds=settings.extraction_cache_ttl_seconds,
+    )
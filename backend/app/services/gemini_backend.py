@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import json
+import random
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Protocol
+
+from google.api_core import exceptions as google_exceptions
+
+from app.core.metrics import GEMINI_TOKENS
+from app.core.settings import get_settings
+from app.services.rate_limiter import estimate_tokens
+
+DEFAULT_RECORDING = "default"
+REPLAY_STREAM_CHUNK_CHARS = 200
+
+
+class ModelBackend(Protocol):
+    # live/record talk to Gemini and need GEMINI_API_KEY; replay works offline.
+    requires_api_key: bool
+
+    async def generate(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> tuple[str, str | None]: ...
+
+    def stream(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        """Yield (text fragment, None) as the answer arrives, then ("", finish_reason)."""
+        ...
+
+
+def finish_reason_name(response: object) -> str | None:
+    try:
+        candidates = getattr(response, "candidates", None) or []
+        if not candidates:
+            return None
+        candidate = candidates[0]
+        finish_reason = getattr(candidate, "finish_reason", None)
+        if finish_reason is None:
+            return None
+        return candidate.FinishReason(finish_reason).name
+    except Exception:
+        return None
+
+
+def _chunk_text(chunk: object) -> str:
+    try:
+        return getattr(chunk, "text", "") or ""
+    except ValueError:
+        # Chunks without parts (e.g. the last one, carrying only the finish reason) have no text.
+        return ""
+
+
+def _count_usage(response: object) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        GEMINI_TOKENS.inc("prompt", amount=getattr(usage, "prompt_token_count", 0) or 0)
+        GEMINI_TOKENS.inc("output", amount=getattr(usage, "candidates_token_count", 0) or 0)
+
+
+def prompt_hash(prompt: str | list[dict], response_mime_type: str) -> str:
+    """Recording key: the exact prompt (or multi-turn contents) plus the requested mime type."""
+    canonical = json.dumps(prompt, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(f"{response_mime_type}\x00{canonical}".encode("utf-8")).hexdigest()
+
+
+class LiveBackend:
+    """Calls Gemini through the GenerativeModel handle."""
+
+    requires_api_key = True
+
+    async def generate(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> tuple[str, str | None]:
+        response = await model.generate_content_async(prompt, generation_config=generation_config)
+        _count_usage(response)
+        return (response.text or "").strip(), finish_reason_name(response)
+
+    async def stream(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        response = await model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+        async for chunk in response:
+            fragment = _chunk_text(chunk)
+            if fragment:
+                yield fragment, None
+        # After iteration the response holds the joined result: final finish reason and usage.
+        _count_usage(response)
+        yield "", finish_reason_name(response)
+
+
+class RecordingStore:
+    """One JSON file per prompt hash: {"text", "finish_reason", "model", "recorded_at"}."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> dict | None:
+        try:
+            return json.loads(self._path(key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, entry: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Unique temp file + atomic rename: concurrent saves of the same prompt never see a partial file.
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as tmp_file:
+            json.dump(entry, tmp_file, ensure_ascii=False, indent=2)
+        Path(tmp_file.name).replace(self._path(key))
+
+
+class RecordBackend:
+    """Live Gemini calls whose answers are also saved for later replay."""
+
+    requires_api_key = True
+
+    def __init__(self, store: RecordingStore) -> None:
+        self.store = store
+        self._live = LiveBackend()
+        self.recorded = 0
+        self.errors = 0
+
+    async def generate(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> tuple[str, str | None]:
+        text, finish_reason = await self._live.generate(model, prompt, generation_config)
+        entry = {
+            "text": text,
+            "finish_reason": finish_reason,
+            "model": getattr(model, "model_name", None),
+            "recorded_at": time.time(),
+        }
+        await self._save(prompt, generation_config, entry)
+        return text, finish_reason
+
+    async def stream(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        fragments: list[str] = []
+        async for fragment, finish_reason in self._live.stream(model, prompt, generation_config):
+            fragments.append(fragment)
+            yield fragment, finish_reason
+        entry = {
+            "text": "".join(fragments).strip(),
+            "finish_reason": finish_reason,
+            "model": getattr(model, "model_name", None),
+            "recorded_at": time.time(),
+        }
+        await self._save(prompt, generation_config, entry)
+
+    async def _save(self, prompt: str | list[dict], generation_config: dict, entry: dict) -> None:
+        key = prompt_hash(prompt, generation_config.get("response_mime_type", ""))
+        try:
+            await asyncio.to_thread(self.store.save, key, entry)
+            self.recorded += 1
+        except OSError:
+            # A failed recording must not fail the live request.
+            self.errors += 1
+
+
+class ReplayBackend:
+    """
+    Serves recorded answers offline, with injected faults for load tests:
+    - latency (+ uniform jitter) per call
+    - MAX_TOKENS truncation: a cut answer, whose continuation request is served from the same recording
+    - 429: ResourceExhausted, exercising the client-side retry/backoff path
+    Prompts without a recording get default.json from the recordings dir, if present.
+    """
+
+    requires_api_key = False
+
+    def __init__(
+        self,
+        store: RecordingStore,
+        latency_seconds: float = 0.0,
+        jitter_seconds: float = 0.0,
+        truncation_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.store = store
+        self.latency_seconds = max(0.0, latency_seconds)
+        self.jitter_seconds = max(0.0, jitter_seconds)
+        self.truncation_rate = truncation_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self.served = 0
+        self.misses = 0
+        self.injected_truncations = 0
+        self.injected_rate_limits = 0
+
+    def _lookup(self, prompt: str | list[dict], response_mime_type: str) -> dict | None:
+        entry = self.store.load(prompt_hash(prompt, response_mime_type))
+        if entry is None:
+            entry = self.store.load(DEFAULT_RECORDING)
+        return entry
+
+    def _continuation(self, prompt: list[dict]) -> str | None:
+        """Answer a [user, model(truncated), user(continue)] request with the rest of the recorded text."""
+        if len(prompt) < 3 or prompt[1].get("role") != "model":
+            return None
+        original, partial = prompt[0].get("parts", [""])[0], prompt[1].get("parts", [""])[0]
+        entry = self._lookup(original, "application/json")
+        if entry is None:
+            return None
+        text = str(entry.get("text") or "")
+        position = text.find(partial)
+        if not partial or position < 0:
+            return None
+        return text[position + len(partial) :]
+
+    def _truncate(self, text: str) -> str:
+        # Cut between two non-space characters, so the answer's .strip() keeps the prefix intact.
+        cut = int(len(text) * self._random.uniform(0.3, 0.8))
+        while 0 < cut < len(text) - 1 and (text[cut - 1].isspace() or text[cut].isspace()):
+            cut += 1
+        return text[:cut]
+
+    async def generate(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> tuple[str, str | None]:
+        text, finish_reason = await self._generate(prompt, generation_config)
+        self._count_tokens(prompt, text)
+        return text, finish_reason
+
+    async def stream(
+        self, model: Any, prompt: str | list[dict], generation_config: dict
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        # The injected latency is spread over the chunks, like tokens arriving from the API.
+        delay = self._delay()
+        text, finish_reason = self._answer(prompt, generation_config)
+        self._count_tokens(prompt, text)
+        chunks = [
+            text[start : start + REPLAY_STREAM_CHUNK_CHARS] for start in range(0, len(text), REPLAY_STREAM_CHUNK_CHARS)
+        ]
+        for chunk in chunks:
+            if delay > 0:
+                await asyncio.sleep(delay / len(chunks))
+            yield chunk, None
+        yield "", finish_reason
+
+    @staticmethod
+    def _count_tokens(prompt: str | list[dict], text: str) -> None:
+        # No usage metadata offline: estimate, so token dashboards still move during load tests.
+        GEMINI_TOKENS.inc("prompt", amount=estimate_tokens(json.dumps(prompt, ensure_ascii=False)))
+        GEMINI_TOKENS.inc("output", amount=estimate_tokens(text))
+
+    def _delay(self) -> float:
+        return self.latency_seconds + self._random.uniform(0, self.jitter_seconds)
+
+    async def _generate(self, prompt: str | list[dict], generation_config: dict) -> tuple[str, str | None]:
+        delay = self._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._answer(prompt, generation_config)
+
+    def _answer(self, prompt: str | list[dict], generation_config: dict) -> tuple[str, str | None]:
+        if self._random.random() < self.rate_limit_rate:
+            self.injected_rate_limits += 1
+            raise google_exceptions.ResourceExhausted("429 Resource has been exhausted (replay).")
+
+        if isinstance(prompt, list):
+            continuation = self._continuation(prompt)
+            if continuation is not None:
+                self.served += 1
+                return continuation.strip(), "STOP"
+
+        response_mime_type = generation_config.get("response_mime_type", "")
+        entry = self._lookup(prompt, response_mime_type)
+        if entry is None:
+            self.misses += 1
+            raise RuntimeError(
+                f"Nenhuma resposta gravada para este prompt em {self.store.directory}. "
+                "Grave com GEMINI_BACKEND=record ou crie default.json."
+            )
+
+        self.served += 1
+        text = str(entry.get("text") or "")
+        if text and response_mime_type == "application/json" and self._random.random() < self.truncation_rate:
+            self.injected_truncations += 1
+            return self._truncate(text), "MAX_TOKENS"
+        return text, entry.get("finish_reason") or "STOP"
+
+
+def _build_backend(name: str) -> ModelBackend:
+    settings = get_settings()
+    backend = (name or "").strip().lower()
+    if backend in {"", "live"}:
+        return LiveBackend()
+    store = RecordingStore(settings.gemini_recordings_dir)
+    if backend == "record":
+        return RecordBackend(store)
+    if backend == "replay":
+        return ReplayBackend(
+            store,
+            latency_seconds=settings.gemini_replay_latency_ms / 1000,
+            jitter_seconds=settings.gemini_replay_jitter_ms / 1000,
+            truncation_rate=settings.gemini_replay_truncation_rate,
+            rate_limit_rate=settings.gemini_replay_rate_limit_rate,
+            seed=settings.gemini_replay_seed,
+        )
+    raise RuntimeError(f"GEMINI_BACKEND desconhecido: '{name}'. Use live, record ou replay.")
+
+
+@lru_cache
+def get_model_backend() -> ModelBackend:
+    return _build_backend(get_settings().gemini_backend)
@@ -0,0 +1,234 @@
+import asyncio
+import time
+from functools import lru_cache
+
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.generative_models import GenerativeModel
+
+from app.core.settings import get_settings
+from app.services.rate_limiter import GeminiRateLimiter, RateLimitExceededError, backoff_delay
+
+RATE_LIMITED = "rate_limited"
+NOT_FOUND = "not_found"
+
+# A model missing for a key (404) is not retried on that key for this long.
+NOT_FOUND_COOLDOWN_SECONDS = 600.0
+# Latency assumed for a key/model pair before its first answer, and the EWMA weight of new samples.
+DEFAULT_LATENCY_SECONDS = 1.0
+LATENCY_EWMA_ALPHA = 0.3
+
+
+class GeminiKey:
+    """One API key: its own quota buckets and, per model, latency (EWMA) and cool-downs."""
+
+    def __init__(self, index: int, api_key: str | None, limiter: GeminiRateLimiter) -> None:
+        self.index = index
+        self.api_key = api_key
+        self.limiter = limiter
+        self.latency: dict[str, float] = {}
+        self.unavailable_until: dict[str, float] = {}
+        self.not_found: set[str] = set()
+        self.strikes: dict[str, int] = {}
+        self.calls = 0
+
+    @property
+    def label(self) -> str:
+        # Never expose the key itself in stats.
+        return f"key-{self.index + 1}"
+
+    def available(self, model_name: str, now: float) -> bool:
+        return self.unavailable_until.get(model_name, 0.0) <= now
+
+    def score(self, model_name: str) -> float:
+        """Higher is better: remaining quota share over the expected latency."""
+        return self.limiter.remaining() / self.latency.get(model_name, DEFAULT_LATENCY_SECONDS)
+
+
+class GeminiClientManager:
+    """
+    Process-wide pool of Gemini API keys and models.
+
+    - Each key gets its own async client (the SDK's configure() is global and single-key)
+      and its own request/token buckets; GenerativeModel handles are reused per key and model.
+    - Calls go to the first model of the ordered list that has an available key, on the key
+      with the best remaining-quota/latency score.
+    - A 429 cools that key/model pair down and fails over to the next key, then the next model;
+      a 404 takes the model out for that key.
+    - `slots` caps calls in flight on this worker (GEMINI_MAX_CONCURRENCY).
+
+    grpc.aio channels, asyncio locks and semaphores belong to the event loop that first uses
+    them: when the running loop changes (tests, scripts calling asyncio.run more than once),
+    clients, handles, the slot semaphore and the per-key quota locks are all rebuilt. Quota
+    buckets, cool-downs and latencies are plain numbers and carry over.
+    """
+
+    def __init__(
+        self,
+        api_keys: list[str],
+        models: list[str],
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_wait_seconds: float,
+        retry_base_delay_seconds: float,
+    ) -> None:
+        self.models = models
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_base_delay_seconds = retry_base_delay_seconds
+        # Without keys (replay backend) there is still one keyless slot, so the call path is the same.
+        self.keys = [
+            GeminiKey(index, api_key, GeminiRateLimiter(requests_per_minute, tokens_per_minute, max_wait_seconds))
+            for index, api_key in enumerate(api_keys or [None])
+        ]
+        self._clients: dict[int, glm.GenerativeServiceAsyncClient] = {}
+        self._models: dict[tuple[int, str], GenerativeModel] = {}
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.configurations = 0
+        self.failovers = 0
+
+    def _reset(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._clients.clear()
+        self._models.clear()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        for key in self.keys:
+            key.limiter.reset()
+        self._loop = loop
+        self.configurations += 1
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._reset(loop)
+
+    def start(self) -> None:
+        """Bind to the server's event loop (FastAPI lifespan)."""
+        self._reset(asyncio.get_running_loop())
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        """Per-worker cap on Gemini calls in flight, for the running event loop."""
+        self._bind_loop()
+        return self._slots
+
+    def max_retries(self, preferred: str) -> int:
+        # GEMINI_MAX_RETRIES plus one failover per other key/model pair (the preferred model may not be in the list).
+        return get_settings().gemini_max_retries + len(self.keys) * len(self._model_order(preferred)) - 1
+
+    def _client(self, key: GeminiKey) -> glm.GenerativeServiceAsyncClient:
+        client = self._clients.get(key.index)
+        if client is None:
+            client = glm.GenerativeServiceAsyncClient(client_options={"api_key": key.api_key})
+            self._clients[key.index] = client
+        return client
+
+    def model(self, key: GeminiKey, model_name: str) -> GenerativeModel:
+        self._bind_loop()
+        handle = self._models.get((key.index, model_name))
+        if handle is None:
+            handle = GenerativeModel(model_name)
+            if key.api_key:
+                # GenerativeModel has no client argument; a per-key client is only possible this way.
+                handle._async_client = self._client(key)
+            self._models[(key.index, model_name)] = handle
+        return handle
+
+    def _model_order(self, preferred: str) -> list[str]:
+        return [preferred, *(name for name in self.models if name != preferred)]
+
+    def candidates(self, preferred: str) -> list[tuple[GeminiKey, str]]:
+        """Available (key, model) pairs: models in failover order, best-scored key first within a model."""
+        now = time.monotonic()
+        pairs: list[tuple[GeminiKey, str]] = []
+        for model_name in self._model_order(preferred):
+            keys = [key for key in self.keys if key.available(model_name, now)]
+            keys.sort(key=lambda key: key.score(model_name), reverse=True)
+            pairs.extend((key, model_name) for key in keys)
+        return pairs
+
+    async def acquire(self, preferred: str, tokens: int) -> tuple[GeminiKey, str]:
+        """
+        Pick a key/model for one call and wait for that key's quota.
+        Raises RateLimitExceededError when every pair stays cooling down past GEMINI_QUEUE_WAIT_SECONDS,
+        NotFound when no key can serve any of the models.
+        """
+        self._bind_loop()
+        deadline = time.monotonic() + self.max_wait_seconds
+        while True:
+            candidates = self.candidates(preferred)
+            if candidates:
+                key, model_name = candidates[0]
+                await key.limiter.acquire(tokens)
+                key.calls += 1
+                return key, model_name
+            order = self._model_order(preferred)
+            if all(model_name in key.not_found for key in self.keys for model_name in order):
+                raise google_exceptions.NotFound(f"models not found: {', '.join(order)}")
+            now = time.monotonic()
+            ready_at = min(
+                key.unavailable_until.get(model_name, 0.0)
+                for key in self.keys
+                for model_name in order
+                if model_name not in key.not_found
+            )
+            if ready_at > deadline:
+                raise RateLimitExceededError("Todas as chaves do Gemini estao em espera por limite de uso.")
+            await asyncio.sleep(max(0.0, ready_at - now))
+
+    def record_success(self, key: GeminiKey, model_name: str, latency_seconds: float) -> None:
+        previous = key.latency.get(model_name)
+        key.latency[model_name] = (
+            latency_seconds
+            if previous is None
+            else previous + LATENCY_EWMA_ALPHA * (latency_seconds - previous)
+        )
+        key.strikes.pop(model_name, None)
+
+    def record_failure(self, key: GeminiKey, model_name: str, reason: str) -> None:
+        """Take the pair out of rotation: 429 -> jittered exponential cool-down, 404 -> long cool-down."""
+        now = time.monotonic()
+        if reason == NOT_FOUND:
+            key.not_found.add(model_name)
+            key.unavailable_until[model_name] = now + NOT_FOUND_COOLDOWN_SECONDS
+        else:
+            strikes = key.strikes.get(model_name, 0)
+            key.strikes[model_name] = strikes + 1
+            key.unavailable_until[model_name] = now + backoff_delay(strikes, self.retry_base_delay_seconds)
+        self.failovers += 1
+
+    @property
+    def waiting(self) -> int:
+        return sum(key.limiter.waiting for key in self.keys)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "models": self.models,
+            "failovers": self.failovers,
+            "keys": [
+                {
+                    "key": key.label,
+                    "calls": key.calls,
+                    "quota_remaining": round(key.limiter.remaining(), 2),
+                    "latency_seconds": {name: round(value, 2) for name, value in key.latency.items()},
+                    "cooling_down": sorted(name for name in self.models if not key.available(name, now)),
+                }
+                for key in self.keys
+            ],
+        }
+
+
+@lru_cache
+def get_gemini_clients() -> GeminiClientManager:
+    settings = get_settings()
+    return GeminiClientManager(
+        api_keys=settings.gemini_api_keys_list,
+        models=settings.gemini_models_list,
+        max_concurrency=settings.gemini_max_concurrency,
+        requests_per_minute=settings.gemini_requests_per_minute,
+        tokens_per_minute=settings.gemini_tokens_per_minute,
+        max_wait_seconds=settings.gemini_queue_wait_seconds,
+        retry_base_delay_seconds=settings.gemini_retry_base_delay_seconds,
+    )
@@ -0,0 +1,67 @@
+import json
+from typing import Any, Iterator
+
+
+class TopLevelObjectParser:
+    """
+    Incremental parser for a streamed JSON object: feed() text fragments as they arrive
+    and get back each top-level member ("key", value) as soon as its value is complete.
+
+    Anything before the first "{" (e.g. a ```json fence) is ignored. Only top-level
+    members are decoded; nested objects and arrays are scanned, not parsed, until closed.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start: int | None = None
+        self.closed = False
+
+    def feed(self, fragment: str) -> Iterator[tuple[str, Any]]:
+        self._buffer += fragment
+        buffer = self._buffer
+        while self._position < len(buffer) and not self.closed:
+            char = buffer[self._position]
+            self._position += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._position
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.closed = True
+                    yield from self._emit(self._position - 1)
+            elif char == "," and self._depth == 1:
+                yield from self._emit(self._position - 1)
+                self._member_start = self._position
+
+    def _emit(self, end: int) -> Iterator[tuple[str, Any]]:
+        if self._member_start is None:
+            return
+        member = self._buffer[self._member_start : end].strip()
+        self._member_start = None
+        if not member:
+            return
+        try:
+            decoded = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            # Malformed member: skip it; the caller still parses the full answer at the end.
+            return
+        yield from decoded.items()
@@ -0,0 +1,198 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Iterator, TypeVar, cast
+
+from app.core.settings import get_settings
+
+T = TypeVar("T")
+
+_STREAM_DONE = object()
+
+
+def open_source(source: bytes | str) -> io.BytesIO | str:
+    """Parser input: in-memory bytes, or the path of an upload spooled to disk."""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+class ParserBusyError(RuntimeError):
+    """Raised when the parser queue is full and the job was not accepted."""
+
+
+class ParserTimeoutError(RuntimeError):
+    """Raised when a parse job exceeds PARSER_TIMEOUT_SECONDS."""
+
+
+class ParserPool:
+    """
+    Runs CPU-bound parsing (pdfplumber, pypdf, python-docx) outside the event loop.
+
+    - kind="process": one process per worker, scales across cores (default).
+    - kind="thread": lighter, but shares the GIL with the API.
+    Jobs beyond max_workers + max_queue are rejected with ParserBusyError.
+    A job past timeout_seconds frees its slot at once in process mode (the workers are
+    killed and replaced); a thread cannot be killed, so it keeps the slot until it returns.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue: int, timeout_seconds: float) -> None:
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout_seconds = timeout_seconds
+        self._executor: Executor | None = None
+        self._stream_executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="parser")
+            else:
+                # spawn: forking a process that already holds gRPC/HTTP clients is unsafe.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._executor
+
+    def _get_stream_executor(self) -> ThreadPoolExecutor:
+        # Generators cannot cross process boundaries, so streamed jobs always run on threads.
+        if self.kind == "thread":
+            return cast(ThreadPoolExecutor, self._get_executor())
+        if self._stream_executor is None:
+            self._stream_executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="parser-stream"
+            )
+        return self._stream_executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise ParserBusyError("Servidor ocupado processando outros arquivos. Tente novamente em instantes.")
+            self._in_flight += 1
+
+    def _release(self, _: object = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    @staticmethod
+    def _timeout_error() -> ParserTimeoutError:
+        return ParserTimeoutError(
+            "Tempo limite excedido ao processar o arquivo. Verifique se o documento nao esta corrompido."
+        )
+
+    def _recycle_executor(self, executor: Executor) -> None:
+        """Kill a process executor's workers (a running job cannot be cancelled) and start a fresh one on next use."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # ProcessPoolExecutor has no public way to stop a busy worker before Python 3.14 (terminate_workers).
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., T], *args: object) -> T:
+        self._acquire()
+        release_slot = True
+        retried = False
+        try:
+            while True:
+                executor = self._get_executor()
+                future = executor.submit(func, *args)
+                try:
+                    return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_seconds)
+                except BrokenProcessPool:
+                    # Workers died under this job (crash, or recycled after another job's timeout):
+                    # replace the executor and run the job once more.
+                    self._recycle_executor(executor)
+                    if retried:
+                        raise
+                    retried = True
+                except asyncio.TimeoutError as exc:
+                    if self.kind == "process":
+                        self._recycle_executor(executor)
+                    elif not future.cancel():
+                        # The stuck thread keeps its slot until it really returns, so new jobs
+                        # are refused instead of piling up behind it.
+                        future.add_done_callback(self._release)
+                        release_slot = False
+                    raise self._timeout_error() from exc
+        finally:
+            if release_slot:
+                self._release()
+
+    async def stream(self, func: Callable[..., Iterator[T]], *args: object) -> AsyncIterator[T]:
+        """
+        Run a blocking generator on a parser thread and yield its items as they are produced.
+        The job holds one pool slot for its whole life; the timeout applies to each item.
+        """
+        self._acquire()
+        loop = asyncio.get_running_loop()
+        executor = self._get_stream_executor()
+        iterator: Iterator[T] | None = None
+        pending: asyncio.Future | None = None
+        try:
+            iterator = iter(func(*args))
+            while True:
+                pending = loop.run_in_executor(executor, next, iterator, _STREAM_DONE)
+                try:
+                    item = await asyncio.wait_for(asyncio.shield(pending), timeout=self.timeout_seconds)
+                except asyncio.TimeoutError as exc:
+                    raise self._timeout_error() from exc
+                pending = None
+                if item is _STREAM_DONE:
+                    break
+                yield cast(T, item)
+        finally:
+            if pending is not None and not pending.done():
+                # The worker thread is still inside next(); free the slot once it returns.
+                pending.add_done_callback(self._release)
+            else:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+                self._release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._stream_executor is not None:
+            self._stream_executor.shutdown(wait=False, cancel_futures=True)
+            self._stream_executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+        }
+
+
+@lru_cache
+def get_parser_pool() -> ParserPool:
+    settings = get_settings()
+    kind = (settings.parser_executor or "process").strip().lower()
+    if kind not in {"process", "thread"}:
+        raise RuntimeError(f"PARSER_EXECUTOR desconhecido: '{settings.parser_executor}'. Use process ou thread.")
+    return ParserPool(
+        kind=kind,
+        max_workers=settings.parser_max_workers or (os.cpu_count() or 1),
+        max_queue=settings.parser_max_queue,
+        timeout_seconds=settings.parser_timeout_seconds,
+    )
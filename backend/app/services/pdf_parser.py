@@ -1,39 +1,82 @@
-import io
+from typing import Iterator
 
 import pdfplumber
 from pypdf import PdfReader
 
+from app.core.metrics import stage_timer
+from app.services.parser_pool import get_parser_pool, open_source
 
-async def parse_pdf(file_content: bytes) -> str:
+# Pages are joined with a form feed on its own line: line-based parsing sees a blank line,
+# and text compaction can still tell where each page starts and ends. This is part of the
+# /api/parse text (documented in the README), which clients send back to /api/extract as is.
+PAGE_BREAK = "\n\f\n"
+
+
+def _pypdf_page_text(reader: PdfReader, index: int) -> str:
+    try:
+        return (reader.pages[index].extract_text() or "").strip()
+    except Exception:
+        return ""
+
+
+def iter_pdf_pages(source: bytes | str) -> Iterator[tuple[int, str]]:
     """
-    Extract plain text from PDF.
+    Yield (page_number, text) for each page with extractable text, as soon as it is parsed.
     Primary parser: pdfplumber
-    Fallback parser: pypdf
+    Fallback parser: pypdf, only for the pages pdfplumber could not read
     """
-    parts: list[str] = []
+    reader: PdfReader | None = None
 
+    def fallback_reader() -> PdfReader:
+        nonlocal reader
+        if reader is None:
+            reader = PdfReader(open_source(source))
+        return reader
+
+    pdf = None
     try:
-        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-            for page in pdf.pages:
-                text = (page.extract_text() or "").strip()
-                if text:
-                    parts.append(text)
+        pdf = pdfplumber.open(open_source(source))
+        pages = pdf.pages
     except Exception:
-        parts = []
+        if pdf is not None:
+            pdf.close()
+        pdf, pages = None, []
 
-    if parts:
-        return "\n".join(parts).strip()
+    if pdf is not None:
+        with pdf:
+            for index, page in enumerate(pages):
+                try:
+                    text = (page.extract_text() or "").strip()
+                except Exception:
+                    text = ""
+                if not text:
+                    try:
+                        text = _pypdf_page_text(fallback_reader(), index)
+                    except Exception:
+                        text = ""
+                if text:
+                    yield index + 1, text
+        return
 
     try:
-        reader = PdfReader(io.BytesIO(file_content))
-        for page in reader.pages:
-            text = (page.extract_text() or "").strip()
-            if text:
-                parts.append(text)
+        fallback = fallback_reader()
     except Exception as exc:
         raise ValueError(f"Nao foi possivel extrair texto do PDF: {exc}") from exc
+    for index in range(len(fallback.pages)):
+        text = _pypdf_page_text(fallback, index)
+        if text:
+            yield index + 1, text
 
+
+def extract_pdf_text(source: bytes | str) -> str:
+    """Extract plain text from PDF (blocking, runs inside the parser pool)."""
+    parts = [text for _, text in iter_pdf_pages(source)]
     if not parts:
         raise ValueError("PDF nao contem texto extraivel (provavel PDF escaneado/imagem).")
+    return PAGE_BREAK.join(parts).strip()
+
 
-    return "\n".join(parts).strip()
+async def parse_pdf(source: bytes | str) -> str:
+    """Extract plain text from PDF without blocking the event loop."""
+    with stage_timer("parse_pdf"):
+        return await get_parser_pool().run(extract_pdf_text, source)
@@ -0,0 +1,112 @@
+import asyncio
+import random
+import time
+
+CHARS_PER_TOKEN = 4
+
+
+class RateLimitExceededError(RuntimeError):
+    """Raised when a call would wait longer than the queue-wait budget for quota."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token), good enough for client-side budgeting."""
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float = 60.0) -> float:
+    """Exponential backoff with full jitter: uniform(0, base * 2^attempt), capped."""
+    return random.uniform(0, min(max_seconds, base_seconds * 2**attempt))
+
+
+class TokenBucket:
+    """Refills `capacity` units per minute, continuously. capacity <= 0 disables the bucket."""
+
+    def __init__(self, capacity_per_minute: int) -> None:
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        # A single request larger than the bucket only has to wait for a full bucket.
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if self.enabled:
+            self.tokens -= min(amount, self.capacity)
+
+    def available_fraction(self, now: float) -> float:
+        """Share of the bucket currently available (1.0 when disabled)."""
+        if not self.enabled:
+            return 1.0
+        self._refill(now)
+        return max(0.0, self.tokens / self.capacity)
+
+
+class GeminiRateLimiter:
+    """
+    Client-side limiter for one Gemini API key in this worker:
+    requests/min and (estimated) input tokens/min, served in FIFO order.
+    A 429 is handled by the key pool, which cools the key/model pair down
+    and fails over (see gemini_clients.GeminiClientManager).
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, max_wait_seconds: float) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.throttled = 0
+
+    def reset(self) -> None:
+        """New FIFO lock for a new event loop (asyncio.Lock binds to the first loop it waits on)."""
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+
+    def remaining(self) -> float:
+        """Share of quota left right now (0..1): the tighter bucket."""
+        now = time.monotonic()
+        return min(self.requests.available_fraction(now), self.tokens.available_fraction(now))
+
+    def _delay(self, tokens: int, now: float) -> float:
+        return max(
+            self.requests.delay_for(1, now),
+            self.tokens.delay_for(tokens, now),
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        deadline = time.monotonic() + self.max_wait_seconds
+        self.waiting += 1
+        try:
+            # asyncio.Lock is FIFO: the head of the queue waits for capacity, the rest wait behind it.
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(tokens, now)
+                    if delay <= 0:
+                        self.requests.consume(1)
+                        self.tokens.consume(tokens)
+                        return
+                    if now + delay > deadline:
+                        self.throttled += 1
+                        raise RateLimitExceededError("Fila de chamadas ao Gemini excedeu o tempo maximo de espera.")
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+
@@ -0,0 +1,128 @@
+import copy
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from docx import Document as load_document
+from docx.document import Document as DocxDocument
+from docx.oxml.parser import parse_xml
+from docxtpl import DocxTemplate
+from jinja2 import Environment, Template
+from lxml import etree
+
+TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates"
+
+
+class _CachingEnvironment(Environment):
+    """Jinja environment that compiles each XML source only once."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._compiled: dict[str, Template] = {}
+
+    def from_string(self, source, globals=None, template_class=None):  # type: ignore[override]
+        if globals is not None or template_class is not None or not isinstance(source, str):
+            return super().from_string(source, globals=globals, template_class=template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            self._compiled[source] = template
+        return template
+
+
+class _CompiledTemplate:
+    def __init__(self, path: Path, mtime_ns: int, document: DocxDocument, body_xml: str) -> None:
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.document = document
+        self.body_xml = body_xml
+        self.jinja_env = _CachingEnvironment()
+
+
+class RegistryDocxTemplate(DocxTemplate):
+    """DocxTemplate bound to an in-memory copy of a compiled template; never reads the file again."""
+
+    def __init__(self, compiled: _CompiledTemplate) -> None:
+        super().__init__(str(compiled.path))
+        self.docx = copy.deepcopy(compiled.document)
+        self._compiled = compiled
+
+    def init_docx(self, reload: bool = True) -> None:
+        # The document copy is handed over already loaded; each instance renders once.
+        return
+
+    def build_xml(self, context, jinja_env=None):
+        return self.render_xml_part(
+            self._compiled.body_xml, self.docx._part, context, jinja_env or self._compiled.jinja_env
+        )
+
+    def map_tree(self, tree) -> None:
+        # docxtpl builds the rendered body with a plain lxml parser; bind it to python-docx's
+        # oxml classes so the document can be post-processed in memory before the single save.
+        super().map_tree(parse_xml(etree.tostring(tree)))
+
+    def build_headers_footers_xml(self, context, uri, jinja_env=None):
+        return super().build_headers_footers_xml(context, uri, jinja_env or self._compiled.jinja_env)
+
+    def render_properties(self, context, jinja_env=None) -> None:
+        super().render_properties(context, jinja_env or self._compiled.jinja_env)
+
+
+class TemplateRegistry:
+    """
+    Keeps every DOCX template parsed and its Jinja body pre-compiled in memory.
+    Entries are reloaded when the file's mtime changes.
+    """
+
+    def __init__(self, templates_dir: Path) -> None:
+        self.templates_dir = templates_dir
+        self._entries: dict[Path, _CompiledTemplate] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.preloaded = False
+
+    def _compile(self, path: Path, mtime_ns: int) -> _CompiledTemplate:
+        document = load_document(str(path))
+        # Patch the body XML (docxtpl's tag cleanup) once instead of on every render.
+        patcher = DocxTemplate(str(path))
+        patcher.docx = document
+        body_xml = patcher.patch_xml(patcher.get_xml())
+        compiled = _CompiledTemplate(path, mtime_ns, document, body_xml)
+        # Warm up the Jinja cache with the exact source DocxTemplate.render_xml_part compiles.
+        compiled.jinja_env.from_string(re.sub(r"<w:p([ >])", r"\n<w:p\1", body_xml))
+        self.loads += 1
+        return compiled
+
+    def _entry(self, path: Path) -> _CompiledTemplate:
+        mtime_ns = path.stat().st_mtime_ns
+        entry = self._entries.get(path)
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            return entry
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.mtime_ns != mtime_ns:
+                entry = self._compile(path, mtime_ns)
+                self._entries[path] = entry
+        return entry
+
+    def preload(self) -> None:
+        for path in sorted(self.templates_dir.glob("*.docx")):
+            self._entry(path)
+        self.preloaded = True
+
+    def acquire(self, path: Path) -> RegistryDocxTemplate:
+        """Return an isolated, render-ready copy. Raises FileNotFoundError if the template is missing."""
+        return RegistryDocxTemplate(self._entry(path))
+
+    def stats(self) -> dict:
+        return {
+            "preloaded": self.preloaded,
+            "loaded": sorted(path.stem for path in self._entries),
+            "loads": self.loads,
+        }
+
+
+@lru_cache
+def get_template_registry() -> TemplateRegistry:
+    return TemplateRegistry(TEMPLATES_DIR)
@@ -0,0 +1,128 @@
+import re
+from typing import Callable
+
+# Bump whenever compact_resume_text changes output (part of the extraction cache key).
+COMPACTION_VERSION = "2"
+
+# PDF text separates pages with a form feed (pdf_parser.PAGE_BREAK); other text is a single page.
+PAGE_BREAK_CHAR = "\f"
+# Running headers/footers are looked for among the first and last lines of each page.
+FURNITURE_EDGE_LINES = 4
+# Only lines at least this long are treated as soft-wrapped: shorter ones are list items,
+# labels or headings that happen to start in lowercase.
+WRAPPED_LINE_MIN_CHARS = 50
+
+INVISIBLE_CHARS_PATTERN = re.compile(r"[\u00ad\u200b-\u200f\u2060\ufeff]")
+SPACES_PATTERN = re.compile(r"[^\S\n]+")
+PAGE_NUMBER_PATTERN = re.compile(
+    r"^(?:(?:p[aá]gina|page|p[aá]g\.?)\s*\d{1,3}(?:\s*(?:de|of|/)\s*\d{1,3})?"
+    r"|\d{1,3}\s*(?:/|de|of)\s*\d{1,3}"
+    r"|[-–—]?\s*\d{1,2}\s*[-–—]?)$",
+    re.IGNORECASE,
+)
+# "Currículo – Fulano   Página 2 de 3": the counter makes every footer unique, so it is cut before deduping.
+PAGE_NUMBER_SUFFIX_PATTERN = re.compile(
+    r"\s+[-–—|]?\s*(?:p[aá]gina|page|p[aá]g\.?)\s*\d{1,3}(?:\s*(?:de|of|/)\s*\d{1,3})?$", re.IGNORECASE
+)
+# Lines with no letter or digit at all: rules (-----, ____), dot leaders, lone bullets or separators.
+NOISE_LINE_PATTERN = re.compile(r"^[\W_]*$")
+HYPHENATED_END_PATTERN = re.compile(r"[a-zà-ÿ]-$")
+# Lowercase first word that is not an e-mail or URL (those start lines of their own).
+CONTINUATION_START_PATTERN = re.compile(r"^[a-zà-ÿ(][^\s@/]*(?:\s|$)")
+SENTENCE_END_CHARS = ".:;!?"
+
+
+def _normalize_line(line: str) -> str:
+    line = INVISIBLE_CHARS_PATTERN.sub("", line)
+    line = SPACES_PATTERN.sub(" ", line).strip()
+    return PAGE_NUMBER_SUFFIX_PATTERN.sub("", line)
+
+
+def _edge_slots(page: list[str]) -> dict[int, list[tuple[int, str]]]:
+    """
+    Line index -> its (offset, casefolded line) slots among the first and last lines of a page:
+    offsets 0, 1... from the top, -1, -2... from the bottom (a short page's lines have both).
+    """
+    slots: dict[int, list[tuple[int, str]]] = {}
+    for index, line in enumerate(page):
+        key = line.casefold()
+        if index < FURNITURE_EDGE_LINES:
+            slots.setdefault(index, []).append((index, key))
+        if index >= len(page) - FURNITURE_EDGE_LINES:
+            slots.setdefault(index, []).append((index - len(page), key))
+    return slots
+
+
+def _furniture_slots(pages: list[list[str]]) -> set[tuple[int, str]]:
+    """
+    Running headers/footers: the same line at the same offset from the top or bottom of at least
+    two pages. Body lines never count, however often they repeat, and single pages have none.
+    """
+    if len(pages) < 2:
+        return set()
+    counts: dict[tuple[int, str], int] = {}
+    for page in pages:
+        for slots in _edge_slots(page).values():
+            for slot in slots:
+                counts[slot] = counts.get(slot, 0) + 1
+    # Labels ("Tecnologias:") repeat by design and introduce content, so they are never furniture.
+    return {slot for slot, count in counts.items() if count > 1 and not slot[1].endswith(":")}
+
+
+def _drop_furniture(pages: list[list[str]]) -> list[str]:
+    """Keep the first copy of each running header/footer, drop its repeats on the following pages."""
+    furniture = _furniture_slots(pages)
+    seen: set[str] = set()
+    kept: list[str] = []
+    for page in pages:
+        repeated: set[int] = set()
+        for index, slots in _edge_slots(page).items():
+            if not any(slot in furniture for slot in slots):
+                continue
+            key = page[index].casefold()
+            if key in seen:
+                repeated.add(index)
+            seen.add(key)
+        kept.extend(line for index, line in enumerate(page) if index not in repeated)
+    return kept
+
+
+def _join_broken_lines(lines: list[str], is_heading: Callable[[str], bool]) -> list[str]:
+    joined: list[str] = []
+    for line in lines:
+        previous = joined[-1] if joined else ""
+        if (
+            len(previous) >= WRAPPED_LINE_MIN_CHARS
+            and CONTINUATION_START_PATTERN.match(line)
+            and not is_heading(line)
+        ):
+            if HYPHENATED_END_PATTERN.search(previous):
+                # "desen-" + "volvimento": hyphenation break inside a word.
+                joined[-1] = previous[:-1] + line
+                continue
+            if previous[-1] not in SENTENCE_END_CHARS:
+                # Soft wrap: the sentence goes on in lowercase on the next line.
+                joined[-1] = f"{previous} {line}"
+                continue
+        joined.append(line)
+    return joined
+
+
+def _page_lines(page: str) -> list[str]:
+    lines = [line for line in (_normalize_line(raw) for raw in page.splitlines()) if line]
+    return [line for line in lines if not PAGE_NUMBER_PATTERN.match(line) and not NOISE_LINE_PATTERN.match(line)]
+
+
+def compact_resume_text(text: str, is_heading: Callable[[str], bool] = lambda _: False) -> str:
+    """
+    Shrink parsed resume text before it goes into the prompt, without dropping content:
+    - collapse whitespace and strip invisible characters (soft hyphens, zero-width spaces)
+    - drop page-number lines and lines made only of symbols (rules, dot leaders, lone bullets)
+    - keep one copy of running headers/footers: lines repeated at the same top/bottom offset of
+      two or more pages (needs the PDF page breaks; single-page text keeps every line)
+    - join hyphenation breaks and lowercase soft-wrapped lines, only after paragraph-length lines
+      and never into a line is_heading() accepts
+    """
+    pages = [_page_lines(page) for page in (text or "").split(PAGE_BREAK_CHAR)]
+    kept = _drop_furniture([page for page in pages if page])
+    return "\n".join(_join_broken_lines(kept, is_heading))
@@ -0,0 +1,339 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from fastapi import Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.metrics import stage_timer
+
+UPLOAD_SPOOL_THRESHOLD_BYTES = 1024 * 1024  # 1MB in memory, larger files go to a temp file
+MULTIPART_OVERHEAD_BYTES = 16 * 1024  # boundaries and part headers on top of the file itself
+MAGIC_BYTES_LENGTH = 4
+
+
+class UploadRejectedError(ValueError):
+    """Upload refused while streaming (size, type or malformed multipart)."""
+
+
+def detect_file_type(content: bytes) -> str | None:
+    if content.startswith(b"%PDF"):
+        return "pdf"
+
+    if content.startswith(b"PK\x03\x04"):
+        return "docx"
+
+    return None
+
+
+class SpooledUpload:
+    """Accepted upload: kept in memory up to the spool threshold, then in a named temp file."""
+
+    def __init__(self, spool_threshold: int = UPLOAD_SPOOL_THRESHOLD_BYTES) -> None:
+        self.spool_threshold = spool_threshold
+        self.filename: str | None = None
+        self.detected_type: str | None = None
+        self.size = 0
+        self.path: str | None = None
+        self._buffer = bytearray()
+        self._file = None
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self._file is None and self.size > self.spool_threshold:
+            self._file = tempfile.NamedTemporaryFile(prefix="devats-upload-", delete=False)
+            self.path = self._file.name
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._buffer.extend(data)
+
+    def finish(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    @property
+    def source(self) -> bytes | str:
+        """Bytes for small files, temp file path for spooled ones (both accepted by the parsers)."""
+        return self.path if self.path is not None else bytes(self._buffer)
+
+    def close(self) -> None:
+        self.finish()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+        self._buffer = bytearray()
+
+
+class _FilePart:
+    """One file part as it arrives: size cap and magic-byte check before anything is kept."""
+
+    def __init__(self, upload: SpooledUpload, max_bytes: int) -> None:
+        self.upload = upload
+        self.max_bytes = max_bytes
+        self._head = b""
+
+    def write(self, chunk: bytes) -> None:
+        if self.upload.size + len(self._head) + len(chunk) > self.max_bytes:
+            raise UploadRejectedError(f"Arquivo muito grande. Maximo: {self.max_bytes // (1024 * 1024)}MB.")
+
+        if self.upload.detected_type is None:
+            # Hold back the first bytes until the magic number can be checked.
+            self._head += chunk
+            if len(self._head) < MAGIC_BYTES_LENGTH:
+                return
+            self._check_magic()
+            chunk, self._head = self._head, b""
+
+        self.upload.write(chunk)
+
+    def end(self) -> None:
+        if self._head:
+            self._check_magic()
+            self.upload.write(self._head)
+            self._head = b""
+        if self.upload.size == 0:
+            raise UploadRejectedError("Arquivo vazio.")
+        self.upload.finish()
+
+    def _check_magic(self) -> None:
+        detected_type = detect_file_type(self._head)
+        if detected_type is None:
+            raise UploadRejectedError("Formato nao suportado. Use PDF ou DOCX.")
+        self.upload.detected_type = detected_type
+
+
+class _MultipartCallbacks(ABC):
+    """Multipart parser callbacks: reads each part's Content-Disposition and calls begin_part(name, filename)."""
+
+    def __init__(self) -> None:
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options[b"filename"].decode("utf-8", "replace") if b"filename" in options else None
+        self.begin_part(name, filename)
+
+    @abstractmethod
+    def begin_part(self, name: str, filename: str | None) -> None: ...
+
+    @abstractmethod
+    def on_part_data(self, data: bytes, start: int, end: int) -> None: ...
+
+    @abstractmethod
+    def on_part_end(self) -> None: ...
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+class _UploadStreamParser(_MultipartCallbacks):
+    """Keeps only the target file field and validates it as bytes arrive."""
+
+    def __init__(self, field_name: str, max_bytes: int, upload: SpooledUpload) -> None:
+        super().__init__()
+        self.field_name = field_name
+        self.upload = upload
+        self.found = False
+        self._file = _FilePart(upload, max_bytes)
+        self._in_target = False
+
+    def begin_part(self, name: str, filename: str | None) -> None:
+        self._in_target = False
+        if name != self.field_name or filename is None or self.found:
+            return
+        self.found = True
+        self._in_target = True
+        self.upload.filename = filename
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_target:
+            self._file.write(data[start:end])
+
+    def on_part_end(self) -> None:
+        if self._in_target:
+            self._in_target = False
+            self._file.end()
+
+
+class _BatchStreamParser(_MultipartCallbacks):
+    """
+    Every file part of `file_field` and text part of `text_field`, each checked as it arrives:
+    per-file size and magic bytes (as in _UploadStreamParser), per-text size and the item count.
+    """
+
+    def __init__(self, file_field: str, text_field: str, max_item_bytes: int, max_items: int) -> None:
+        super().__init__()
+        self.file_field = file_field
+        self.text_field = text_field
+        self.max_item_bytes = max_item_bytes
+        self.max_items = max_items
+        self.uploads: list[SpooledUpload] = []
+        self.texts: list[str] = []
+        self._file: _FilePart | None = None
+        self._text: bytearray | None = None
+
+    def begin_part(self, name: str, filename: str | None) -> None:
+        self._file = None
+        self._text = None
+        if name == self.file_field and filename is not None:
+            upload = SpooledUpload()
+            upload.filename = filename or f"arquivo-{len(self.uploads) + 1}"
+            self.uploads.append(upload)
+            self._file = _FilePart(upload, self.max_item_bytes)
+        elif name == self.text_field and filename is None:
+            self._text = bytearray()
+        else:
+            return
+        if len(self.uploads) + len(self.texts) + (self._text is not None) > self.max_items:
+            raise UploadRejectedError(f"Lote muito grande. Maximo: {self.max_items} itens.")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._file is not None:
+            self._check_file(self._file.write, data[start:end])
+        elif self._text is not None:
+            self._text += data[start:end]
+            if len(self._text) > self.max_item_bytes:
+                raise UploadRejectedError(f"Texto muito grande. Maximo: {self.max_item_bytes // (1024 * 1024)}MB.")
+
+    def on_part_end(self) -> None:
+        if self._file is not None:
+            self._check_file(self._file.end)
+        elif self._text is not None:
+            self.texts.append(self._text.decode("utf-8", "replace"))
+        self._file = None
+        self._text = None
+
+    def _check_file(self, step: Callable[..., None], *args: bytes) -> None:
+        try:
+            step(*args)
+        except UploadRejectedError as exc:
+            # Tell which file of the batch was refused.
+            raise UploadRejectedError(f"{self._file.upload.filename}: {exc}") from exc
+
+    def close(self) -> None:
+        for upload in self.uploads:
+            upload.close()
+
+
+def _multipart_boundary(request: Request, not_multipart_message: str) -> bytes:
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadRejectedError(not_multipart_message)
+    return boundary
+
+
+def _declared_too_large(request: Request, max_body_bytes: int) -> bool:
+    content_length = request.headers.get("content-length")
+    return bool(content_length and content_length.isdigit() and int(content_length) > max_body_bytes)
+
+
+async def receive_upload(request: Request, field_name: str, max_bytes: int) -> SpooledUpload:
+    """
+    Stream a multipart upload straight from the socket.
+    Rejects oversized or non PDF/DOCX files as soon as the offending bytes arrive,
+    instead of after the whole body has been buffered.
+    The caller must close() the returned upload.
+    """
+    if _declared_too_large(request, max_bytes + MULTIPART_OVERHEAD_BYTES):
+        raise UploadRejectedError(f"Arquivo muito grande. Maximo: {max_bytes // (1024 * 1024)}MB.")
+    boundary = _multipart_boundary(
+        request, f"Envie o arquivo como multipart/form-data no campo '{field_name}'."
+    )
+
+    upload = SpooledUpload()
+    handler = _UploadStreamParser(field_name, max_bytes, upload)
+    parser = MultipartParser(boundary, handler.callbacks())
+    try:
+        with stage_timer("upload_read"):
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+    except UploadRejectedError:
+        upload.close()
+        raise
+    except Exception as exc:
+        upload.close()
+        raise UploadRejectedError("Upload multipart invalido.") from exc
+
+    if not handler.found:
+        upload.close()
+        raise UploadRejectedError(f"Nenhum arquivo enviado no campo '{field_name}'.")
+
+    return upload
+
+
+async def receive_batch_upload(
+    request: Request,
+    file_field: str,
+    text_field: str,
+    max_item_bytes: int,
+    max_items: int,
+    max_total_bytes: int,
+) -> tuple[list[SpooledUpload], list[str]]:
+    """
+    Stream a multipart batch (files and/or texts) straight from the socket: every file gets the
+    same checks as receive_upload, and the item count and whole body are capped while reading.
+    The caller must close() every returned upload.
+    """
+    too_large = f"Lote muito grande. Maximo: {max_total_bytes // (1024 * 1024)}MB no total."
+    max_body_bytes = max_total_bytes + MULTIPART_OVERHEAD_BYTES
+    if _declared_too_large(request, max_body_bytes):
+        raise UploadRejectedError(too_large)
+    boundary = _multipart_boundary(
+        request, f"Envie os itens como multipart/form-data nos campos '{file_field}' e/ou '{text_field}'."
+    )
+
+    handler = _BatchStreamParser(file_field, text_field, max_item_bytes, max_items)
+    parser = MultipartParser(boundary, handler.callbacks())
+    received = 0
+    try:
+        with stage_timer("upload_read"):
+            async for chunk in request.stream():
+                # Content-Length may be missing (chunked) or wrong: count what actually arrives.
+                received += len(chunk)
+                if received > max_body_bytes:
+                    raise UploadRejectedError(too_large)
+                parser.write(chunk)
+            parser.finalize()
+    except UploadRejectedError:
+        handler.close()
+        raise
+    except Exception as exc:
+        handler.close()
+        raise UploadRejectedError("Upload multipart invalido.") from exc
+
+    return handler.uploads, handler.texts
@@ -0,0 +1 @@
+"""Performance benchmarks. Run from backend/: python -m benchmarks.<name>"""
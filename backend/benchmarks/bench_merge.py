@@ -0,0 +1,94 @@
+"""
+Benchmark for ai_extractor._merge_experience_collections and _merge_projects.
+
+Merges a synthetic model answer with the section-parser result for resumes with
+N experience/extracurricular entries. Half of the model entries come without a
+company, so most section entries go through the position fallback. Time per entry
+should stay flat as N grows (near-linear merge).
+
+    cd backend && python -m benchmarks.bench_merge
+"""
+import statistics
+import time
+
+from app.services.ai_extractor import _merge_experience_collections, _merge_projects
+
+ROUNDS = 20
+
+
+def build_experiences(entries: int) -> tuple[list[dict], list[dict]]:
+    """(model entries, section entries) for the same resume; every section entry has a company."""
+    model_items = [
+        {
+            "company": "" if i % 2 else f"Liga Academica {i}",
+            "position": f"Membro da diretoria {i}",
+            "start_date": f"{2010 + i % 14}-01",
+            "end_date": None,
+            "current": False,
+            "achievements": [f"Organizei o evento {i}.{j} com 200 participantes." for j in range(3)],
+        }
+        for i in range(entries)
+    ]
+    section_items = [
+        {
+            "company": f"Liga Academica {i}",
+            "position": f"Membro da diretoria {i}",
+            "start_date": f"{2010 + i % 14}-01",
+            "end_date": None,
+            "current": False,
+            "achievements": [f"Organizei o evento {i}.{j} com 200 participantes." for j in range(4)],
+        }
+        for i in reversed(range(entries))
+    ]
+    return model_items, section_items
+
+
+def build_projects(entries: int) -> tuple[list[dict], list[dict]]:
+    model_items = [
+        {"name": f"Projeto {i}", "description": "Plataforma web.", "highlights": [], "technologies": ["Python"]}
+        for i in range(entries)
+    ]
+    section_items = [
+        {
+            "name": f"Projeto {i}",
+            "description": "Plataforma web para gestao de curriculos.",
+            "highlights": [f"Destaque {i}"],
+            "technologies": ["Python", "FastAPI"],
+        }
+        for i in range(0, 2 * entries, 2)
+    ]
+    return model_items, section_items
+
+
+def _median_ms(func, *args) -> float:
+    timings: list[float] = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def bench(entries: int) -> dict:
+    experiences_ms = _median_ms(_merge_experience_collections, *build_experiences(entries))
+    projects_ms = _median_ms(_merge_projects, *build_projects(entries))
+    return {
+        "entries": entries,
+        "experiences_ms": round(experiences_ms, 2),
+        "projects_ms": round(projects_ms, 2),
+        "us_per_entry": round((experiences_ms + projects_ms) * 1000 / entries, 1),
+    }
+
+
+def main() -> None:
+    print(f"{'entries':>7} {'experiences_ms':>15} {'projects_ms':>12} {'us/entry':>9}")
+    for entries in (50, 200, 800, 3200):
+        result = bench(entries)
+        print(
+            f"{result['entries']:>7} {result['experiences_ms']:>15} "
+            f"{result['projects_ms']:>12} {result['us_per_entry']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
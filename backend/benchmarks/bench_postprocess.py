@@ -0,0 +1,57 @@
+"""
+Benchmark for docx_generator._postprocess_document.
+
+Renders a synthetic resume once per size and times only the post-processing pass
+on fresh copies of the rendered document. Time per paragraph should stay flat as
+the document grows (linear cost).
+
+    cd backend && python -m benchmarks.bench_postprocess
+"""
+import copy
+import statistics
+import time
+
+from app.services.docx_generator import _build_context, _postprocess_document, _template_path
+from app.services.template_registry import get_template_registry
+from benchmarks.resume_factory import build_resume
+
+TEMPLATE_ID = "template-backend"
+ROUNDS = 30
+
+
+def _rendered_document(pages: int):
+    doc = get_template_registry().acquire(_template_path(TEMPLATE_ID))
+    doc.render(_build_context(build_resume(pages)))
+    return doc.docx
+
+
+def bench(pages: int) -> dict:
+    rendered = _rendered_document(pages)
+    paragraphs = len(rendered.paragraphs)
+    timings: list[float] = []
+    for _ in range(ROUNDS):
+        doc = copy.deepcopy(rendered)
+        start = time.perf_counter()
+        _postprocess_document(doc)
+        timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    return {
+        "pages": pages,
+        "paragraphs": paragraphs,
+        "median_ms": round(median, 2),
+        "us_per_paragraph": round(median * 1000 / paragraphs, 1),
+    }
+
+
+def main() -> None:
+    print(f"{'pages':>5} {'paragraphs':>10} {'median_ms':>10} {'us/paragraph':>13}")
+    for pages in (1, 2, 4, 8):
+        result = bench(pages)
+        print(
+            f"{result['pages']:>5} {result['paragraphs']:>10} "
+            f"{result['median_ms']:>10} {result['us_per_paragraph']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Synthetic ResumeData payloads sized in approximate rendered pages."""
+from app.models.schemas import ResumeData
+
+
+def build_resume_payload(pages: int = 4) -> dict:
+    """
+    Roughly one rendered A4 page per unit: ~2 experiences with 6 bullets, 2 projects
+    and a few education/course lines per page.
+    """
+    pages = max(1, pages)
+    experiences = [
+        {
+            "company": f"Empresa {i}",
+            "position": "Desenvolvedor Backend",
+            "location": "Sao Luis - MA",
+            "start_date": f"{2010 + i % 14}-0{1 + i % 9}",
+            "end_date": "Atual" if i == 0 else f"{2011 + i % 14}-1{i % 3}",
+            "current": i == 0,
+            "achievements": [
+                f"Desenvolvi o servico {i}.{j} com Node.js, PostgreSQL e Docker, reduzindo a latencia em {10 + j}%."
+                for j in range(6)
+            ],
+        }
+        for i in range(2 * pages)
+    ]
+    projects = [
+        {
+            "name": f"Projeto {i}",
+            "description": "Plataforma web para gestao de curriculos com autenticacao e geracao de documentos.",
+            "highlights": [f"Destaque {i}.{j} do projeto com impacto mensuravel." for j in range(3)],
+            "technologies": ["Python", "FastAPI", "React", "PostgreSQL"],
+        }
+        for i in range(2 * pages)
+    ]
+    return {
+        "personal_info": {
+            "full_name": "Fulano de Tal",
+            "headline": "Desenvolvedor Backend Senior",
+            "email": "fulano@example.com",
+            "phone": "(98) 99999-9999",
+            "location": "Sao Luis - MA",
+            "linkedin": "https://linkedin.com/in/fulano",
+            "github": "https://github.com/fulano",
+        },
+        "summary": "Desenvolvedor backend com experiencia em APIs, mensageria e arquitetura de microsservicos. " * 3,
+        "experiences": experiences,
+        "extracurricular_experiences": [],
+        "education": [
+            {"institution": f"Universidade {i}", "degree": "Ciencia da Computacao", "start_date": "2012", "end_date": "2016"}
+            for i in range(pages)
+        ],
+        "skills": {
+            "technical": ["Python", "Node.js", "TypeScript", "PostgreSQL"],
+            "tools": ["Docker", "Git"],
+            "soft": ["Clean Code", "TDD"],
+            "categorized": {"linguagens": "Python, TypeScript", "ferramentas": "Docker, Git"},
+        },
+        "certifications": [
+            {"name": f"Curso {i}", "issuer": "Alura", "date": "2023"} for i in range(3 * pages)
+        ],
+        "projects": projects,
+        "languages": [{"language": "Ingles", "proficiency": "Avancado"}],
+    }
+
+
+def build_resume(pages: int = 4) -> ResumeData:
+    return ResumeData(**build_resume_payload(pages))
@@ -0,0 +1,335 @@
+"""
+End-to-end benchmark suite over the resumes bundled in /Templates.
+
+Stages:
+- parse_pdf / parse_docx: the parser services (through the parser pool)
+- normalize_enrich: _normalize_resume_payload + _enrich_payload_with_text_hints
+- generate_docx[<template>]: DOCX rendering for every template
+- HTTP routes: /api/parse, /api/extract (ai and fast), /api/generate, in-process via ASGI
+
+Gemini runs on the replay backend (GEMINI_BACKEND=replay) with the recorded extraction in
+benchmarks/fixtures/recordings, so no key, network or quota is needed. Each stage reports latency percentiles, throughput and peak RSS, and the
+whole run is written as JSON so reports from different commits can be compared:
+
+    cd backend && python -m benchmarks.run
+    cd backend && python -m benchmarks.run --compare benchmarks/results/<older>.json
+
+Parsing runs on threads by default (PARSER_EXECUTOR=thread) so its memory shows up in
+this process's RSS; export PARSER_EXECUTOR=process to benchmark the process pool.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Sequence
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Settings are read once and cached, so the benchmark defaults must be set before any app import.
+os.environ.setdefault("GEMINI_BACKEND", "replay")
+os.environ.setdefault("GEMINI_RECORDINGS_DIR", str(FIXTURES_DIR / "recordings"))
+os.environ.setdefault("EXTRACTION_CACHE_BACKEND", "none")
+os.environ.setdefault("GEMINI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("GEMINI_TOKENS_PER_MINUTE", "0")
+os.environ.setdefault("PARSER_EXECUTOR", "thread")
+
+import httpx  # noqa: E402
+
+from app.core.settings import get_settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.schemas import ResumeData  # noqa: E402
+from app.services.ai_extractor import (  # noqa: E402
+    _enrich_payload_with_text_hints,
+    _normalize_for_match,
+    _normalize_resume_payload,
+)
+from app.services.docx_generator import generate_docx  # noqa: E402
+from app.services.docx_parser import parse_docx  # noqa: E402
+from app.services.pdf_parser import parse_pdf  # noqa: E402
+from app.services.gemini_backend import DEFAULT_RECORDING, RecordingStore  # noqa: E402
+from app.services.template_registry import TEMPLATES_DIR  # noqa: E402
+
+CORPUS_DIR = Path(__file__).resolve().parents[2] / "Templates"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+RSS_SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux); falls back to the process peak elsewhere."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRssSampler:
+    """Samples RSS on a background thread while a stage runs and keeps the maximum."""
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(RSS_SAMPLE_INTERVAL_SECONDS)
+
+    def __enter__(self) -> "PeakRssSampler":
+        self.peak = _rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_stage(
+    call: Callable[[object], Awaitable[bool | None]],
+    items: Sequence[object],
+    rounds: int,
+    concurrency: int,
+) -> dict:
+    """
+    Run every item `rounds` times with `concurrency` workers, after one unmeasured warm-up pass.
+    `call` returns False for a failed request (counted in errors, still timed).
+    """
+    for item in items:
+        await call(item)
+
+    jobs = iter([item for _ in range(rounds) for item in items])
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for item in jobs:
+            start = time.perf_counter()
+            ok = await call(item)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if ok is False:
+                errors += 1
+
+    with PeakRssSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p90_ms": round(_percentile(latencies, 90), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+    }
+
+
+def load_recorded_payload() -> dict:
+    """The recorded Gemini extraction the replay backend serves for every prompt."""
+    entry = RecordingStore(get_settings().gemini_recordings_dir).load(DEFAULT_RECORDING)
+    if entry is None:
+        raise SystemExit(f"Gravacao {DEFAULT_RECORDING}.json nao encontrada em GEMINI_RECORDINGS_DIR.")
+    return json.loads(entry["text"])
+
+
+def _load_corpus() -> dict[str, list[Path]]:
+    files = sorted(path for path in CORPUS_DIR.iterdir() if path.suffix.lower() in MIME_TYPES)
+    if not files:
+        raise SystemExit(f"Nenhum PDF/DOCX encontrado em {CORPUS_DIR}.")
+    return {
+        "pdf": [path for path in files if path.suffix.lower() == ".pdf"],
+        "docx": [path for path in files if path.suffix.lower() == ".docx"],
+    }
+
+
+async def run_suite(rounds: int, concurrency: int) -> dict[str, dict]:
+    corpus = _load_corpus()
+    pdfs = [path.read_bytes() for path in corpus["pdf"]]
+    docxs = [path.read_bytes() for path in corpus["docx"]]
+    recorded = load_recorded_payload()
+    templates = sorted(path.stem for path in TEMPLATES_DIR.glob("*.docx"))
+    stages: dict[str, dict] = {}
+
+    async def call_parse_pdf(content: object) -> None:
+        await parse_pdf(content)  # type: ignore[arg-type]
+
+    async def call_parse_docx(content: object) -> None:
+        await parse_docx(content)  # type: ignore[arg-type]
+
+    async with app.router.lifespan_context(app):
+        stages["parse_pdf"] = await run_stage(call_parse_pdf, pdfs, rounds, concurrency)
+        stages["parse_docx"] = await run_stage(call_parse_docx, docxs, rounds, concurrency)
+
+        texts = [await parse_pdf(content) for content in pdfs] + [await parse_docx(content) for content in docxs]
+
+        async def call_normalize_enrich(text: object) -> None:
+            # Cold per resume: the line-normalization cache would otherwise be warm from earlier rounds.
+            _normalize_for_match.cache_clear()
+            normalized = _normalize_resume_payload(copy.deepcopy(recorded))
+            _enrich_payload_with_text_hints(normalized, str(text))
+
+        # CPU-bound and synchronous: concurrency would only interleave, so run it serially.
+        stages["normalize_enrich"] = await run_stage(call_normalize_enrich, texts, rounds, 1)
+
+        text = texts[0]
+        normalized = _normalize_resume_payload(copy.deepcopy(recorded))
+        resume_data = ResumeData(**_enrich_payload_with_text_hints(normalized, text))
+        for template_id in templates:
+
+            async def call_generate(_: object, template_id: str = template_id) -> None:
+                await generate_docx(template_id, resume_data)
+
+            stages[f"generate_docx[{template_id}]"] = await run_stage(call_generate, [None], rounds, concurrency)
+
+        transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+
+            async def call_http_parse(path: object) -> bool:
+                path = Path(str(path))
+                files = {"file": (path.name, path.read_bytes(), MIME_TYPES[path.suffix.lower()])}
+                response = await client.post("/api/parse", files=files)
+                return response.is_success
+
+            async def call_http_extract(body: object) -> bool:
+                response = await client.post("/api/extract", json=body)
+                return response.is_success
+
+            async def call_http_generate(body: object) -> bool:
+                response = await client.post("/api/generate", json=body)
+                return response.is_success
+
+            corpus_files = [*corpus["pdf"], *corpus["docx"]]
+            stages["POST /api/parse"] = await run_stage(call_http_parse, corpus_files, rounds, concurrency)
+            stages["POST /api/extract"] = await run_stage(
+                call_http_extract, [{"text": text} for text in texts], rounds, concurrency
+            )
+            stages["POST /api/extract (mode=fast)"] = await run_stage(
+                call_http_extract, [{"text": text, "mode": "fast"} for text in texts], rounds, concurrency
+            )
+            resume_json = resume_data.model_dump(mode="json")
+            stages["POST /api/generate"] = await run_stage(
+                call_http_generate,
+                [{"template_id": template_id, "resume_data": resume_json} for template_id in templates],
+                rounds,
+                concurrency,
+            )
+
+    return stages
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def print_report(stages: dict[str, dict]) -> None:
+    print(f"{'stage':<36} {'n':>5} {'err':>4} {'p50_ms':>9} {'p90_ms':>9} {'p99_ms':>9} {'rps':>8} {'rss_mb':>7}")
+    for name, result in stages.items():
+        print(
+            f"{name:<36} {result['count']:>5} {result['errors']:>4} {result['p50_ms']:>9} "
+            f"{result['p90_ms']:>9} {result['p99_ms']:>9} {result['throughput_rps']:>8} {result['peak_rss_mb']:>7}"
+        )
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    """p50/p99/throughput change per stage, current vs baseline (negative latency % = faster)."""
+
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'}:")
+    print(f"{'stage':<36} {'p50':>9} {'p99':>9} {'rps':>9}")
+    for name, result in current["stages"].items():
+        old = baseline["stages"].get(name)
+        if old is None:
+            print(f"{name:<36} {'new':>9}")
+            continue
+        print(
+            f"{name:<36} {change(old['p50_ms'], result['p50_ms']):>9} "
+            f"{change(old['p99_ms'], result['p99_ms']):>9} "
+            f"{change(old['throughput_rps'], result['throughput_rps']):>9}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark over /Templates.")
+    parser.add_argument("--rounds", type=int, default=10, help="measured passes over each stage's inputs")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent callers per stage")
+    parser.add_argument("--gemini-latency-ms", type=float, default=0.0, help="simulated Gemini latency")
+    parser.add_argument("--output", type=Path, help="report path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier report to compare against")
+    args = parser.parse_args()
+
+    # The replay backend is built on the first extraction, after this override.
+    get_settings().gemini_replay_latency_ms = args.gemini_latency_ms
+    stages = asyncio.run(run_suite(args.rounds, args.concurrency))
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "rounds": args.rounds,
+            "concurrency": args.concurrency,
+            "gemini_backend": get_settings().gemini_backend,
+            "gemini_latency_ms": args.gemini_latency_ms,
+            "parser_executor": os.environ.get("PARSER_EXECUTOR"),
+        },
+        "stages": stages,
+    }
+    output = args.output or RESULTS_DIR / f"{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print_report(stages)
+    print(f"\nreport: {output}")
+    if args.compare:
+        print_comparison(json.loads(args.compare.read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
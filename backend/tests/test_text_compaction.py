@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from app.services.ai_extractor import _is_section_heading
+from app.services.text_compaction import compact_resume_text
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _compact_lines(text: str) -> list[str]:
+    return compact_resume_text(text, is_heading=_is_section_heading).splitlines()
+
+
+def test_running_header_kept_once_and_page_numbers_dropped():
+    lines = _compact_lines((FIXTURES_DIR / "multipage_resume.txt").read_text())
+
+    assert lines.count("Ana Souza - Curriculo") == 1
+    assert not any(line.startswith("Pagina") for line in lines)
+
+
+def test_body_line_repeated_off_the_page_edges_is_kept():
+    lines = _compact_lines((FIXTURES_DIR / "multipage_resume.txt").read_text())
+
+    # Title in the header block of page 1 and job title in the body of page 2.
+    assert lines.count("Desenvolvedora Backend") == 2
+
+
+def test_single_page_text_keeps_repeated_lines():
+    text = "Desenvolvedora Backend\nResumo\nExperiencia\nDesenvolvedora Backend\nEmpresa X"
+
+    assert _compact_lines(text) == text.splitlines()
+
+
+def test_one_per_line_lists_and_lowercase_headings_are_not_joined():
+    lines = _compact_lines((FIXTURES_DIR / "multipage_resume.txt").read_text())
+
+    assert lines[lines.index("Tecnologias:") + 1 :][:3] == ["python", "docker", "kubernetes"]
+    assert "experiencia profissional" in lines
+    assert "formacao" in lines
+
+
+def test_wrapped_paragraph_lines_are_joined():
+    lines = _compact_lines((FIXTURES_DIR / "multipage_resume.txt").read_text())
+
+    assert (
+        "Engenheira de software com oito anos de experiencia em sistemas distribuidos e "
+        "plataformas de pagamento, com foco em confiabilidade e desenvolvimento orientado a testes."
+    ) in lines
+    assert (
+        "Banco Exemplo, 2019 - atual. Responsavel pela migracao dos servicos de "
+        "conciliacao para filas assincronas."
+    ) in lines